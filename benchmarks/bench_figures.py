@@ -0,0 +1,33 @@
+#Size of the figure JSON sent to the browser, charts over raw plays vs pre-binned counts
+#Run from the repo root: python -m benchmarks.bench_figures [rows]
+import sys, time
+import plotly.express as px
+from benchmarks.bench_memory import new_layout, old_layout
+from listnd.charts import hours_figure, platform_figure
+from listnd.cube import build_cube, rollup
+from listnd.features import DAY_NAMES, HOUR_LABELS
+
+def raw_figures(music):
+    #What make_hours and make_platform drew before, one point per play
+    hours = music.assign(day_name=music['weekday'].map(dict(enumerate(DAY_NAMES))), hour=music['hour'].map(dict(enumerate(HOUR_LABELS))))
+    heatmap = px.density_heatmap(hours, x='hour', y='day_name', category_orders={'day_name': DAY_NAMES, 'hour': HOUR_LABELS})
+    platform = px.histogram(music, x='date', color='platform', nbins=24, barmode='stack')
+    return {'hours': heatmap, 'platform': platform}
+
+def binned_figures(cube):
+    return {'hours': hours_figure(rollup(cube, ['weekday', 'hour'])), 'platform': platform_figure(rollup(cube, ['platform', 'date']))}
+
+def report(name, figures):
+    for chart, fig in figures.items():
+        start = time.perf_counter()
+        payload = fig.to_json()
+        print(f"{name} {chart:8}: {len(payload) / 2**20:8.2f} MB, serialized in {time.perf_counter() - start:.2f} s")
+
+def main(rows=1000000):
+    music = new_layout(old_layout(rows))
+    print(f"{rows} plays")
+    report('raw   ', raw_figures(music))
+    report('binned', binned_figures(build_cube(music)))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
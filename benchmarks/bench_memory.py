@@ -0,0 +1,54 @@
+#Memory of the merged listening frame, old object layout vs categorical/integer layout
+#Run from the repo root: python -m benchmarks.bench_memory [rows]
+import sys, time
+import numpy as np
+import pandas as pd
+from listnd.cleaners import MERGED_COLUMNS
+from listnd.features import HOUR_LABELS, add_time_features
+
+def old_layout(rows, n_artists=5000, n_titles=60000, seed=0):
+    #What dataframe_merge used to build: python strings, datetime.date objects and '1 PM' hour labels
+    rng = np.random.default_rng(seed)
+    ts = pd.Series(pd.to_datetime('2015-01-01') + pd.to_timedelta(rng.integers(0, 10 * 365 * 86400, rows), unit='s'))
+    artist_names = np.array([f"Artist {i}" for i in range(n_artists)], dtype=object)
+    title_names = np.array([f"Song title number {i}" for i in range(n_titles)], dtype=object)
+    title_ids = rng.integers(0, n_titles, rows)
+    return pd.DataFrame({
+        'artist': pd.Series(artist_names[title_ids % n_artists], dtype=object),
+        'title': pd.Series(title_names[title_ids], dtype=object),
+        'ts': ts,
+        'date': pd.Series(ts.dt.date, dtype=object),
+        'hour': pd.Series(np.array(HOUR_LABELS, dtype=object)[ts.dt.hour], dtype=object),
+        'month': ts.dt.month, 'yearMonth': ts.dt.to_period('M').dt.to_timestamp(), 'year': ts.dt.year,
+        'msPlayed': pd.Series(rng.integers(0, 300000, rows), dtype=object),
+        'platform': pd.Series(rng.choice(np.array(['spotify', 'youtube', 'apple'], dtype=object), rows), dtype=object),
+    })
+
+def new_layout(old):
+    #The same plays as the cleaners now emit them
+    new = old.copy()
+    for column in ['artist', 'title', 'platform']:
+        new[column] = new[column].astype('category')
+    new = add_time_features(new, 'ts')
+    new['msPlayed'] = new['msPlayed'].astype('float64')
+    return new[MERGED_COLUMNS]
+
+def report(name, frame):
+    usage = frame.memory_usage(deep=True, index=False)
+    start = time.perf_counter()
+    frame.groupby(['title', 'artist'], observed=True).size()
+    frame.groupby(['date', 'hour'], observed=True).size()
+    grouped = time.perf_counter() - start
+    print(f"{name}: {usage.sum() / 2**20:8.1f} MB, groupbys {grouped:.2f} s")
+    return usage
+
+def main(rows=1000000):
+    old = old_layout(rows)
+    new = new_layout(old)
+    print(f"{rows} plays")
+    old_usage, new_usage = report('old', old), report('new', new)
+    table = pd.DataFrame({'old MB': old_usage, 'new MB': new_usage}) / 2**20
+    print(table.round(2).fillna('-').to_string())
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
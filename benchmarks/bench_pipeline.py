@@ -0,0 +1,93 @@
+#Time and peak memory of every stage from export bytes to report figures, compared with stored baselines
+#Run from the repo root: python -m benchmarks.bench_pipeline [rows ...] [--save]
+#Baselines are machine specific, save them again before comparing on another machine
+import json, os, sys, time, tracemalloc
+from io import BytesIO
+import plotly.io as pio
+from benchmarks.exports import generate
+from listnd.canonical import TrackNames
+from listnd.cleaners import (parse_json, parse_csv, clean_spotify, clean_spotifyFull, clean_youtube,
+    clean_apple, merge_spotify, unify, concat_plays)
+from listnd.cube import PartitionedCube
+from listnd.dedup import mark_copies
+from listnd.parsing import parse_apple_history, parse_spotifyFull
+from listnd.report import report_sections
+
+BASELINES = os.path.join(os.path.dirname(__file__), 'baselines.json')
+#The sizes with stored baselines, 1000000 needs well over 5 GB of memory so it only runs when asked for
+SIZES = [10000, 100000]
+
+def measure(step):
+    #Timed on its own, then again under tracemalloc for the peak (tracing slows the run down)
+    start = time.perf_counter()
+    result = step()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    step()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, {'seconds': round(seconds, 4), 'peak_mb': round(peak / 2**20, 2)}
+
+def stages(uploads):
+    #Yields (stage name, stats), each stage feeding the next like the app does
+    parsed, stats = measure(lambda: {
+        'spotify': [parse_json(BytesIO(file)) for file in uploads['spotify']],
+        'spotifyFull': [parse_spotifyFull(BytesIO(file)) for file in uploads['spotifyFull']],
+        'youtube': [parse_json(BytesIO(file)) for file in uploads['youtube']],
+        'apple_history': [parse_apple_history(BytesIO(file)) for file in uploads['apple_history']],
+        'apple_songs': [parse_csv(BytesIO(file)) for file in uploads['apple_songs']]})
+    yield 'parse', stats
+    cleaners = {
+        'spotify': lambda: concat_plays([clean_spotify(frame.copy()) for frame in parsed['spotify']]),
+        'spotifyFull': lambda: concat_plays([clean_spotifyFull(frame.copy()) for frame in parsed['spotifyFull']]),
+        'youtube': lambda: clean_youtube(concat_plays(parsed['youtube'])),
+        'apple': lambda: clean_apple(concat_plays(parsed['apple_history']), concat_plays(parsed['apple_songs']))}
+    frames = {}
+    for kind, clean in cleaners.items():
+        frames[kind], stats = measure(clean)
+        yield f'clean {kind}', stats
+    spotifyFull = frames.pop('spotifyFull')
+    frames['spotify'], stats = measure(lambda: merge_spotify(frames['spotify'], spotifyFull))
+    yield 'merge spotify', stats
+    music, stats = measure(lambda: concat_plays([unify(frame, platform) for platform, frame in frames.items()]))
+    yield 'merge', stats
+    music, stats = measure(lambda: TrackNames().canonicalize(music)[0]) #a fresh mapping, like a first session
+    yield 'canonicalize', stats
+    music, stats = measure(lambda: mark_copies(music)[0])
+    yield 'dedupe', stats
+    cubes, stats = measure(lambda: PartitionedCube(music))
+    yield 'cube', stats
+    report, stats = measure(lambda: report_sections(cubes, list(frames)))
+    yield 'charts', stats
+    payloads, stats = measure(lambda: [pio.to_json(item) for items in report.values() for item in items if not isinstance(item, str)])
+    yield 'figure json', stats
+
+def load_baselines():
+    if not os.path.exists(BASELINES):
+        return {}
+    with open(BASELINES) as f:
+        return json.load(f)
+
+def main(argv):
+    save = '--save' in argv
+    sizes = [int(arg) for arg in argv if arg != '--save'] or SIZES
+    baselines = load_baselines()
+    for rows in sizes:
+        uploads = generate(rows)
+        baseline = baselines.get(str(rows), {})
+        results = {}
+        print(f"{rows} plays per platform, {sum(len(file) for files in uploads.values() for file in files) / 2**20:.1f} MB of exports")
+        for stage, stats in stages(uploads):
+            results[stage] = stats
+            line = f"  {stage:18} {stats['seconds']:8.3f} s {stats['peak_mb']:9.1f} MB"
+            if stage in baseline:
+                line += f"   x{stats['seconds'] / max(baseline[stage]['seconds'], 1e-4):.2f} time, x{stats['peak_mb'] / max(baseline[stage]['peak_mb'], 0.01):.2f} memory vs baseline"
+            print(line)
+        baselines[str(rows)] = results
+    if save:
+        with open(BASELINES, 'w') as f:
+            json.dump(baselines, f, indent=1)
+        print(f"Saved baselines to {BASELINES}")
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
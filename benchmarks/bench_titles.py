@@ -0,0 +1,55 @@
+#Per-row cost of the YouTube title cleaner, old loop vs one compiled pattern
+#Run from the repo root: python -m benchmarks.bench_titles [rows] [artists]
+import random, re, sys, time
+import pandas as pd
+from listnd.matching import build_title_pattern, TITLE_CUTS
+
+def synthetic_titles(rows, n_artists, seed=0):
+    #Titles shaped like watch-history.json after 'Watched ' is removed
+    rng = random.Random(seed)
+    artists = [f"{rng.choice(['The', 'DJ', 'Lil', 'Big'])} {rng.choice(['Moon', 'River', 'Echo', 'Static', 'Velvet'])} {i}" for i in range(n_artists)]
+    suffixes = ['', ' (Official Video)', ' (Audio)', ' (lyrics)', ' (Official Music Video)']
+    titles = []
+    for _ in range(rows):
+        song = f"Song {rng.randint(0, 20000)}"
+        if rng.random() < 0.5:
+            titles.append(song)
+        else:
+            titles.append(f"{rng.choice(artists)} - {song}{rng.choice(suffixes)}")
+    return artists, pd.Series(titles)
+
+def old_clean_title(title, artists): #what clean_youtube did per row before
+    for artist in artists:
+        pattern = re.compile(re.escape(artist), re.IGNORECASE)
+        title = pattern.sub('', title)
+    for phrase in TITLE_CUTS:
+        pattern = re.compile(re.escape(phrase), re.IGNORECASE)
+        title = pattern.sub('', title)
+    return title.strip()
+
+def main(rows=200000, n_artists=3000, old_sample=500):
+    artists, titles = synthetic_titles(rows, n_artists)
+
+    #The old loop is far too slow for the full history, so time it on a sample
+    sample = titles.head(old_sample)
+    start = time.perf_counter()
+    old = sample.apply(old_clean_title, artists=artists)
+    old_per_row = (time.perf_counter() - start) / len(sample)
+
+    start = time.perf_counter()
+    pattern = build_title_pattern(artists, TITLE_CUTS)
+    built = time.perf_counter() - start
+    new = titles.str.replace(pattern, '', regex=True).str.strip()
+    new_total = time.perf_counter() - start
+    new_per_row = new_total / len(titles)
+
+    mismatches = (old != new.head(old_sample)).sum()
+    print(f"{rows} rows, {n_artists} artists")
+    print(f"old: {old_per_row * 1e6:10.1f} us/row  (sampled {old_sample} rows, ~{old_per_row * rows:.0f} s for all rows)")
+    print(f"new: {new_per_row * 1e6:10.1f} us/row  ({new_total:.2f} s for all rows, {built:.2f} s to build the pattern)")
+    print(f"speedup: {old_per_row / new_per_row:.0f}x")
+    #The old loop could strip 'DJ Echo 1' out of 'DJ Echo 12 - Song', the pattern takes the longest name
+    print(f"{mismatches} of {old_sample} sampled titles differ")
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
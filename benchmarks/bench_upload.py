@@ -0,0 +1,74 @@
+#Peak memory of receiving and parsing a large upload, base64 data URL vs the chunked spool
+#Run from the repo root: python -m benchmarks.bench_upload [rows]
+import base64, io, json, os, random, shutil, sys, tempfile, tracemalloc
+import pandas as pd
+from listnd.parsing import parse_spotify
+from listnd.spool import UploadSpool
+
+CHUNK_SIZE = 4 * 2**20 #what assets/chunked_upload.js sends per request
+
+def write_history(path, rows, seed=0):
+    #StreamingHistory*.json written row by row so the generator itself stays small
+    rng = random.Random(seed)
+    with open(path, 'w') as history:
+        history.write('[')
+        for i in range(rows):
+            play = {'endTime': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}",
+                    'artistName': f"Artist {rng.randint(0, 3000)}", 'trackName': f"Song title number {rng.randint(0, 40000)}",
+                    'msPlayed': rng.randint(0, 300000)}
+            history.write((',\n' if i else '\n') + json.dumps(play))
+        history.write('\n]')
+
+def peak(step):
+    tracemalloc.start()
+    result = step()
+    size = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, size / 2**20
+
+def old_upload(path):
+    #dcc.Upload hands the callback a data URL, parse_contents decoded it in full
+    with open(path, 'rb') as history:
+        contents = 'data:application/json;base64,' + base64.b64encode(history.read()).decode()
+    def receive():
+        content_type, content_string = contents.split(',')
+        decoded = base64.b64decode(content_string)
+        return pd.read_json(io.StringIO(decoded.decode('utf-8')))
+    return peak(receive)
+
+def spool_upload(path, spool):
+    #Each request body is one chunk, the server copies it to disk block by block
+    def receive():
+        with open(path, 'rb') as history:
+            offset = 0
+            while chunk := history.read(CHUNK_SIZE):
+                offset, accepted = spool.write('bench', offset, io.BytesIO(chunk))
+        return offset
+    return peak(receive)
+
+def spool_parse(spool):
+    def parse():
+        with spool.open('bench') as stream:
+            return parse_spotify(stream)
+    return peak(parse)
+
+def main(rows=1000000):
+    root = tempfile.mkdtemp(prefix='listnd-bench-')
+    try:
+        path = os.path.join(root, 'StreamingHistory0.json')
+        write_history(path, rows)
+        print(f"{rows} plays, {os.path.getsize(path) / 2**20:.1f} MB file")
+        spool = UploadSpool(os.path.join(root, 'spool'))
+        received, receiving = spool_upload(path, spool)
+        frame, parsing = spool_parse(spool)
+        old, old_peak = old_upload(path)
+        assert received == os.path.getsize(path) and len(frame) == len(old) == rows
+        #The chunk read from the file and its copy as the request body, plus the blocks copied to disk. Not the file size
+        assert receiving < (2 * CHUNK_SIZE + 2 * spool.block_size) / 2**20, f"receiving took {receiving:.1f} MB, more than a chunk"
+        print(f"data URL: {old_peak:8.1f} MB peak to receive and parse")
+        print(f"spool:    {receiving:8.1f} MB peak to receive ({CHUNK_SIZE / 2**20:.0f} MB chunks), {parsing:.1f} MB to parse")
+    finally:
+        shutil.rmtree(root)
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
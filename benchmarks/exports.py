@@ -0,0 +1,111 @@
+#Seeded synthetic exports shaped like the real files, for the benchmarks
+#generate(rows) gives every platform `rows` plays as {uploader kind: [file bytes]}, what load_uploads takes
+import csv, io, json
+import numpy as np
+import pandas as pd
+
+#A share of the columns of the real Apple Music Play Activity.csv, only three of them are used
+APPLE_HISTORY_HEADER = ['Apple Id Number', 'Apple Music Subscription', 'Build Version', 'Client IP Address', 'Content Name',
+    'Content Provider', 'Content Specific Type', 'Device Identifier', 'Device OS Name', 'Device OS Version', 'Device Type',
+    'Display Language', 'End Position In Milliseconds', 'End Reason Type', 'Event End Timestamp', 'Event Reason Hint Type',
+    'Event Received Timestamp', 'Event Start Timestamp', 'Event Type', 'Feature Name', 'Item Type', 'Media Duration In Milliseconds',
+    'Media Type', 'Metrics Bucket Id', 'Metrics Client Id', 'Milliseconds Since Play', 'Offline', 'Play Duration Milliseconds',
+    'Provided Audio Bit Depth', 'Provided Audio Channel', 'Provided Audio Sample Rate', 'Repeat Play', 'Session Is Shared',
+    'Shuffle Play', 'Song Name', 'Source Type', 'Start Position In Milliseconds', 'Store Country Name', 'Subscription Type',
+    'UTC Offset In Seconds']
+APPLE_HISTORY_FILLER = dict(zip(APPLE_HISTORY_HEADER, ['1234567890', 'true', 'Music/1.4 iPhone/17.0', '10.0.0.1', '',
+    'Label', 'Song', '0A1B2C3D4E5F', 'iOS', '17.0', 'IPHONE', 'en-US', '0', 'NATURAL_END_OF_TRACK', '', 'NOT_SPECIFIED',
+    '2024-01-01T00:00:00.000Z', '', 'PLAY_END', 'library / album_detail', 'ITUNES_STORE_CONTENT', '', 'AUDIO', '12345',
+    'client', '0', 'false', '', '16', 'STEREO', '44100', 'false', 'false', 'false', '', 'ORIGINATING_DEVICE', '0',
+    'United States', 'Premium', '-18000']))
+
+#How each service splits its export into files
+FILE_ROWS = {'spotify': 10000, 'spotifyFull': 16000, 'youtube': None}
+
+def _catalog(rng, n_artists=4000, songs_per_artist=25):
+    #A few artists get most plays, like a real history
+    artists = np.array([f"{rng.choice(['The', 'DJ', 'Lil', 'Big', 'MC', ''])} {rng.choice(['Moon', 'River', 'Echo', 'Static', 'Velvet', 'Neon'])} {i}".strip() for i in range(n_artists)], dtype=object)
+    weights = 1 / np.arange(1, n_artists + 1) ** 1.1
+    return artists, weights / weights.sum(), songs_per_artist
+
+def _plays(rows, seed, start, years):
+    rng = np.random.default_rng(seed)
+    artists, weights, songs = _catalog(rng)
+    artist_ids = rng.choice(len(artists), rows, p=weights)
+    song_ids = rng.integers(0, songs, rows)
+    times = pd.Timestamp(start) + pd.to_timedelta(np.sort(rng.integers(0, years * 365 * 86400, rows)), unit='s')
+    return rng, artists[artist_ids], np.char.add('Song ', (artist_ids * songs + song_ids).astype(str)).astype(object), times
+
+def _json_files(records, per_file):
+    if per_file is None:
+        return [json.dumps(records).encode()]
+    return [json.dumps(records[i:i + per_file]).encode() for i in range(0, max(len(records), 1), per_file)]
+
+def spotify(rows, seed=0):
+    #StreamingHistory_music_*.json, one year
+    rng, artists, titles, times = _plays(rows, seed, '2024-01-01', 1)
+    ms = rng.integers(0, 300000, rows).tolist()
+    ends = times.strftime('%Y-%m-%d %H:%M')
+    records = [{'endTime': end, 'artistName': artist, 'trackName': title, 'msPlayed': played}
+        for end, artist, title, played in zip(ends, artists, titles, ms)]
+    return _json_files(records, FILE_ROWS['spotify'])
+
+def spotify_full(rows, seed=0):
+    #Streaming_History_Audio_*.json, several years with some podcast rows that have no track
+    rng, artists, titles, times = _plays(rows, seed, '2016-01-01', 8)
+    ms = rng.integers(0, 300000, rows).tolist()
+    podcast = (rng.random(rows) < 0.02).tolist()
+    skipped = (rng.random(rows) < 0.2).tolist()
+    records = [{'ts': ts, 'platform': 'android', 'ms_played': played, 'conn_country': 'US', 'ip_addr': '10.0.0.1',
+        'master_metadata_track_name': None if pod else title, 'master_metadata_album_artist_name': None if pod else artist,
+        'master_metadata_album_album_name': None if pod else f"{artist} Album", 'spotify_track_uri': None if pod else 'spotify:track:0',
+        'episode_name': 'Episode' if pod else None, 'episode_show_name': 'Show' if pod else None, 'spotify_episode_uri': None,
+        'reason_start': 'trackdone', 'reason_end': 'fwdbtn' if skip else 'trackdone', 'shuffle': False, 'skipped': skip,
+        'offline': False, 'offline_timestamp': None, 'incognito_mode': False}
+        for ts, artist, title, played, pod, skip in zip(times.strftime('%Y-%m-%dT%H:%M:%SZ'), artists, titles, ms, podcast, skipped)]
+    return _json_files(records, FILE_ROWS['spotifyFull'])
+
+def youtube(rows, seed=0):
+    #watch-history.json: topic channel plays, music videos with the artist in the title, plain YouTube and removed videos
+    rng, artists, titles, times = _plays(rows, seed, '2020-01-01', 4)
+    kinds = rng.choice(['topic', 'video', 'youtube', 'removed'], rows, p=[0.6, 0.3, 0.07, 0.03]).tolist()
+    suffixes = rng.choice(['', ' (Official Video)', ' (Official Music Video)', ' (Audio)', ' (lyrics)'], rows).tolist()
+    records = []
+    for when, artist, title, kind, suffix in zip(times.strftime('%Y-%m-%dT%H:%M:%S.%fZ'), artists, titles, kinds, suffixes):
+        record = {'header': 'YouTube' if kind == 'youtube' else 'YouTube Music', 'titleUrl': 'https://music.youtube.com/watch?v=x',
+            'time': when, 'products': ['YouTube'], 'activityControls': ['YouTube watch history']}
+        if kind == 'topic':
+            record.update(title=f"Watched {title}", subtitles=[{'name': f"{artist} - Topic", 'url': 'https://www.youtube.com/channel/x'}])
+        elif kind == 'video':
+            record.update(title=f"Watched {artist} - {title}{suffix}", subtitles=[{'name': f"{artist.replace(' ', '')}VEVO", 'url': 'https://www.youtube.com/channel/x'}])
+        elif kind == 'youtube':
+            record.update(title="Watched a video", subtitles=[{'name': 'Some Channel', 'url': 'https://www.youtube.com/channel/x'}])
+        else:
+            record.update(title="Watched https://music.youtube.com/watch?v=x")
+        records.append(record)
+    records.reverse() #newest first, like Takeout
+    return _json_files(records, FILE_ROWS['youtube'])
+
+def apple(rows, seed=0):
+    #Apple Music Play Activity.csv and Apple Music - Track Play History.csv
+    rng, artists, titles, times = _plays(rows, seed, '2021-01-01', 3)
+    history = io.StringIO()
+    writer = csv.writer(history)
+    writer.writerow(APPLE_HISTORY_HEADER)
+    durations = rng.integers(60000, 300000, rows).tolist()
+    for when, title, duration in zip(times.strftime('%Y-%m-%dT%H:%M:%S.000Z'), titles, durations):
+        row = dict(APPLE_HISTORY_FILLER, **{'Event Start Timestamp': when, 'Event End Timestamp': when, 'Song Name': title,
+            'Content Name': title, 'Media Duration In Milliseconds': duration, 'Play Duration Milliseconds': duration})
+        writer.writerow([row[column] for column in APPLE_HISTORY_HEADER])
+    songs = io.StringIO()
+    writer = csv.writer(songs)
+    writer.writerow(['Track Name', 'Last Played Date', 'Is User Initiated', 'Play Duration Milliseconds'])
+    played = pd.DataFrame({'artist': artists, 'title': titles}).drop_duplicates()
+    for artist, title in zip(played['artist'], played['title']):
+        writer.writerow([f"{artist} - {title}", 20231231, True, int(rng.integers(1000, 10**7))])
+    return history.getvalue().encode(), songs.getvalue().encode()
+
+def generate(rows, seed=0):
+    apple_history, apple_songs = apple(rows, seed + 3)
+    return {'spotify': spotify(rows, seed), 'spotifyFull': spotify_full(rows, seed + 1), 'youtube': youtube(rows, seed + 2),
+        'apple_history': [apple_history], 'apple_songs': [apple_songs]}
@@ -0,0 +1,80 @@
+//Uploads for the .chunked-upload drop zones in dashCode.py
+//Files go to /upload/<id> in slices so the browser never base64 encodes a whole export,
+//picking the same file again resumes from what the server already has
+(function () {
+    var CHUNK_SIZE = 4 * 1024 * 1024;
+
+    function uploadId(file) {
+        var key = 'listnd-upload:' + file.name + ':' + file.size + ':' + file.lastModified;
+        var id = localStorage.getItem(key);
+        if (!id) {
+            id = Date.now().toString(36) + Math.random().toString(36).slice(2);
+            localStorage.setItem(key, id);
+        }
+        return id;
+    }
+
+    async function received(response) {
+        if (!response.ok && response.status !== 409) { //409 means the offset was stale, resume from the server's size
+            throw new Error('Upload failed with status ' + response.status);
+        }
+        return (await response.json()).received;
+    }
+
+    async function send(file, progress) {
+        var id = uploadId(file);
+        var offset = await received(await fetch('/upload/' + id));
+        while (offset < file.size) {
+            var response = await fetch('/upload/' + id, {
+                method: 'POST',
+                headers: {'X-Upload-Offset': String(offset)},
+                body: file.slice(offset, offset + CHUNK_SIZE)
+            });
+            offset = await received(response);
+            progress(offset);
+        }
+        return {id: id, name: file.name, size: file.size};
+    }
+
+    async function upload(zone, files) {
+        var total = files.reduce(function (sum, file) { return sum + file.size; }, 0);
+        var done = 0, uploaded = [];
+        try {
+            for (var file of files) {
+                uploaded.push(await send(file, function (offset) {
+                    var percent = total ? Math.floor(100 * (done + offset) / total) : 100;
+                    dash_clientside.set_props(zone.id, {children: 'Uploading ' + percent + '%'});
+                }));
+                done += file.size;
+            }
+        } catch (error) {
+            dash_clientside.set_props(zone.id, {children: error.message + ', select the files again to resume'});
+            return;
+        }
+        dash_clientside.set_props(zone.dataset.store, {data: uploaded});
+    }
+
+    function zoneOf(event) {
+        return event.target.closest && event.target.closest('.chunked-upload');
+    }
+
+    document.addEventListener('click', function (event) {
+        var zone = zoneOf(event);
+        if (!zone) return;
+        var input = document.createElement('input');
+        input.type = 'file';
+        input.multiple = true;
+        input.accept = '.json';
+        input.onchange = function () { upload(zone, Array.from(input.files)); };
+        input.click();
+    });
+    document.addEventListener('dragover', function (event) {
+        if (zoneOf(event)) event.preventDefault();
+    });
+    document.addEventListener('drop', function (event) {
+        var zone = zoneOf(event);
+        if (!zone) return;
+        event.preventDefault();
+        upload(zone, Array.from(event.dataTransfer.files));
+    });
+})();
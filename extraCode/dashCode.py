@@ -1,27 +1,35 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import plotly.express as px
-import re, dash, base64, calendar, webbrowser, plotly.colors
+import re, dash, calendar, webbrowser, plotly.colors, os, sys, uuid
 from dash import dcc, html, Dash, Input, Output, State
-from io import BytesIO, StringIO
-
-def parse_contents(contents):
-    #For parsing inputted json files 
-    content_type, content_string = contents.split(',')
-    decoded = base64.b64decode(content_string)
-    return pd.read_json(StringIO(decoded.decode('utf-8')))
+from flask import jsonify, request
+from io import BytesIO
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) #shared code lives in listnd/
+from listnd.cache import FrameCache
+from listnd.charts import day_totals, platform_figure
+from listnd.features import add_time_features
+from listnd.matching import ArtistMatcher, build_title_pattern, TITLE_CUTS
+from listnd.parsing import parse_spotify, parse_youtube
+from listnd.spool import UploadSpool
+from listnd.topk import TopK, top_k
+
+def read_uploads(files, parse):
+    #Parse every spooled file of one platform straight from disk. The files stay until the spool prunes them,
+    #the store still lists them and Generate Analysis reparses them for another year or after an eviction
+    frames = []
+    for upload in files:
+        if spool.received(upload['id']) != upload['size']:
+            raise ValueError(f"{upload['name']} did not finish uploading")
+        with spool.open(upload['id']) as stream:
+            frames.append(parse(stream))
+    return pd.concat(frames, ignore_index=True)
 
 def clean_spotify(spotify, year): 
     #Convert spotify endTime to datetime
     spotify['endTime'] = pd.to_datetime(spotify['endTime']) 
-    spotify['date'] = pd.to_datetime(spotify['endTime'].dt.date)
-    spotify['time'] = spotify['endTime'].dt.strftime('%H:%M')
-    spotify['hour'] = spotify['endTime'].dt.strftime('%H') #need hour for graph
-    spotify['hour'] = pd.to_numeric(spotify['hour']) 
-    spotify['year'] = spotify['endTime'].dt.strftime('%Y')
-    spotify['year'] = pd.to_numeric(spotify['year'])
-    spotify['month'] = spotify['endTime'].dt.strftime('%m')
-    spotify['month'] = pd.to_numeric(spotify['month'])
+    spotify = add_time_features(spotify, 'endTime') #need hour for graph
     spotify = spotify[spotify['year']==year] #only data from 2024
     spotify.rename(columns={'artistName': 'artist', 'trackName': 'title'}, inplace=True) #rename columns
     return spotify
@@ -29,17 +37,10 @@ def clean_spotify(spotify, year):
 def clean_youtube(youtube, year):
     #Clean Youtube
     youtube = youtube[youtube['header']=='YouTube Music'] #only take data from youtube music 
-    youtube = youtube.drop(['titleUrl', 'products', 'activityControls', 'description', 'details', 'header'], axis=1)
+    youtube = youtube.drop(['titleUrl', 'products', 'activityControls', 'description', 'details', 'header'], axis=1, errors='ignore')
     #Convert youtube ListTime to datetime
     youtube['ListTime'] = pd.to_datetime(youtube['time'], errors='coerce', utc=True)
-    youtube['date'] = pd.to_datetime(youtube['ListTime'].dt.date) 
-    youtube['time'] = youtube['ListTime'].dt.strftime('%H:%M')
-    youtube['hour'] = youtube['ListTime'].dt.strftime('%H')
-    youtube['hour'] = pd.to_numeric(youtube['hour'])
-    youtube['year'] = youtube['ListTime'].dt.strftime('%Y')
-    youtube['year'] = pd.to_numeric(youtube['year'])
-    youtube['month'] = youtube['ListTime'].dt.strftime('%m')
-    youtube['month'] = pd.to_numeric(youtube['month'])
+    youtube = add_time_features(youtube, 'ListTime')
     youtube = youtube[youtube['year']==year] #only take data from 2024
 
     #Clean Youtube Song Titles
@@ -50,7 +51,7 @@ def clean_youtube(youtube, year):
             return cleaned
     youtube['title'] = youtube['title'].apply(delete_watched) 
     #Get artist names from list in subtitles
-    youtube = youtube[~youtube['subtitles'].apply(lambda x: isinstance(x, float))] #drop float rows
+    youtube = youtube[youtube['subtitles'].apply(lambda x: isinstance(x, list))] #drop rows without a channel
     def get_name(value): #Index artist names 
         return value[0]['name']
     youtube['artist'] = youtube['subtitles'].apply(get_name) #Make artist column 
@@ -66,28 +67,15 @@ def clean_youtube(youtube, year):
     youtube['artist'] = youtube['artist'].str.replace(r"[•·]", " ", regex=True)
     artists = youtube[youtube['cleaned_flag']==True]['artist'].unique() #Create list of clean artists
     sorted_artists = sorted(artists, key=len, reverse=True) #sort greatest to shortest to match longest
-    #Find artist from artist name in title
-    def find_artist(title): #Function to find artist name in title
-        for artist in artists:
-            if artist.lower() in title.lower():
-                return artist
-        return None
-    for idx, row in youtube[~youtube['cleaned_flag']].iterrows():
-        artist_found = find_artist(row['title']) #change artist if found in title
-        if artist_found:
-            youtube.at[idx, 'artist'] = artist_found 
-    #Clean random words from song title
-    def clean_title(title):
-        for artist in artists: #eliminate artist from title
-            pattern = re.compile(re.escape(artist), re.IGNORECASE)
-            title = pattern.sub('', title)
-        cuts = ['(Un-Official Video)', '(Official Video)', '(lyrics)', '-', '(Official)', '(Audio)', '(Official Music Video)', '(feat. )']
-        for phrase in cuts: #eliminate phrases from title
-            pattern = re.compile(re.escape(phrase), re.IGNORECASE)
-            title = pattern.sub('', title)
-        title = title.strip()
-        return title
-    youtube['title'] = youtube['title'].apply(clean_title)
+    #Find artist from artist name in title, longest artist wins
+    matcher = ArtistMatcher(sorted_artists)
+    unflagged = ~youtube['cleaned_flag']
+    found = matcher.find(youtube.loc[unflagged, 'title'])
+    found = found[found.notna()] #change artist if found in title
+    youtube.loc[found.index, 'artist'] = found
+    #Clean random words from song title, artists and cut phrases in one pass
+    title_pattern = build_title_pattern(artists, TITLE_CUTS)
+    youtube['title'] = youtube['title'].str.replace(title_pattern, '', regex=True).str.strip()
     return youtube
 
 def dataframe_merge(spotifydf, youtubedf, selected_platform):
@@ -113,8 +101,7 @@ def get_artist_color_map(artists):
     return {artist: color for artist, color in zip(artists, colors)}
 
 def make_topsongs(dataframe, color_map):
-    song_counts = dataframe.groupby(['title', 'artist']).size().reset_index(name='count')
-    top10 = song_counts.sort_values('count', ascending=False).head(10)
+    top10 = TopK(['title', 'artist']).update(dataframe).top(10).reset_index(name='count')
 
     fig = px.bar(top10, x="title", y="count", color="artist", 
                  color_discrete_map=color_map, 
@@ -126,14 +113,10 @@ def make_topsongs(dataframe, color_map):
 
 def make_topartists(dataframe, color_map):
     #For pie chart
-    artist_freq = dataframe['artist'].value_counts().reset_index()
-    artist_freq.columns = ['artist', 'count'] #frequency of top artists 
-    artist_freq = artist_freq.reset_index()
-    top_artist = artist_freq.sort_values('count', ascending=False)
-    artist10 = top_artist.head(10)
+    artist10 = TopK(['artist']).update(dataframe).top(10).reset_index(name='count') #frequency of top artists 
 
     #For line graph of top 5 artists over time
-    top5_art = top_artist['artist'].head(5).unique() #list of top 5 artists
+    top5_art = artist10['artist'].head(5).unique() #list of top 5 artists
     top5 = dataframe[dataframe['artist'].isin(top5_art)]
     monthly_counts = top5.groupby(['artist', 'month']).size().reset_index(name='listen_count')
 
@@ -149,15 +132,11 @@ def make_topartists(dataframe, color_map):
 def make_platform(dataframe, platforms):
     if len(platforms) == 1:
         return html.Div(f"Analysed all of your data from {platforms[0]} :)")
-    fig = px.histogram(dataframe, x='date', color='platform', nbins=24, barmode='stack',
-    title='Platforms Used Throughout The Year')
-    fig.update_layout(xaxis_title='date', yaxis_title='songs')
-    return dcc.Graph(figure=fig)
+    return dcc.Graph(figure=platform_figure(day_totals(dataframe)))
 
 def monthly_analysis(dataframe, months, color_map):
     mdf = dataframe[dataframe['month'].isin(months)]
-    monthly_artists = mdf.groupby(['artist']).size().reset_index(name='count')
-    top5 = monthly_artists.sort_values('count', ascending=False).head(5)
+    top5 = top_k(mdf.groupby(['artist']).size(), 5).reset_index(name='count')
     pie = px.pie(top5, values='count', names='artist',
                   title="Top 5 Artists for Select Months", color_discrete_map=color_map)
     return dcc.Graph(figure=pie)
@@ -165,28 +144,42 @@ def monthly_analysis(dataframe, months, color_map):
 
 app=Dash() #Create app
 app.title="Listnd"
+sessions = FrameCache(max_bytes=1024 * 2**20) #cleaned frames stay on the server, the browser only keeps their key
+spool = UploadSpool(os.environ.get('LISTND_UPLOAD_DIR'), max_bytes=int(os.environ.get('LISTND_UPLOAD_MB', 2048)) * 2**20)
+
+@app.server.route('/upload/<upload_id>', methods=['GET', 'POST'])
+def upload_chunk(upload_id):
+    #assets/chunked_upload.js sends files here in pieces, GET tells it where to resume
+    try:
+        if request.method == 'GET': #asked once at the start of every upload, a good time to clear abandoned ones
+            spool.prune()
+            return jsonify(received=spool.received(upload_id))
+        offset = int(request.headers.get('X-Upload-Offset', 0))
+        received, accepted = spool.write(upload_id, offset, request.stream)
+    except ValueError as error:
+        return jsonify(error=str(error)), 400
+    return jsonify(received=received), 200 if accepted else 409
+
+def upload_zone(id, store):
+    #Drop zone handled by assets/chunked_upload.js, finished files are listed in the store
+    return html.Div(
+        id=id, className='chunked-upload', **{'data-store': store},
+        children=html.Div(['Drag and Drop or ', html.A('Select Files')]),
+        style={'width': '100%', 'height': '60px', 'lineHeight': '60px', 'borderWidth': '1px',
+        'borderStyle': 'dashed', 'borderRadius': '5px', 'textAlign': 'center','margin': '10px', 'cursor': 'pointer'}
+    )
 
 app.layout = html.Div([
     dcc.Store(id='stored-data'),
+    dcc.Store(id='spotify-files'),
+    dcc.Store(id='youtube-files'),
     html.H1("Listnd Dashboard for the Year"),
 
     html.Div([
         html.Label("Upload Spotify Data:"),
-        dcc.Upload(
-            id='spotify-upload',
-            children=html.Div(['Drag and Drop or ', html.A('Select Files')]),
-            style={'width': '100%', 'height': '60px', 'lineHeight': '60px', 'borderWidth': '1px',
-            'borderStyle': 'dashed', 'borderRadius': '5px', 'textAlign': 'center','margin': '10px'},
-            multiple = False
-        ),
+        upload_zone('spotify-upload', 'spotify-files'),
         html.Label("Upload Youtube Music Data:"),
-        dcc.Upload(
-            id='youtube-upload',
-            children=html.Div(['Drag and Drop or ', html.A('Select Files')]),
-            style={'width': '100%', 'height': '60px', 'lineHeight': '60px', 'borderWidth': '1px',
-            'borderStyle': 'dashed', 'borderRadius': '5px', 'textAlign': 'center','margin': '10px'},
-            multiple = False
-        )
+        upload_zone('youtube-upload', 'youtube-files')
     ]),
     html.Div([
         html.Div([
@@ -237,32 +230,34 @@ app.layout = html.Div([
 @app.callback(
     Output('stored-data', 'data'),
     Input('generate-button', 'n_clicks'),
-    State('spotify-upload', 'contents'),
-    State('youtube-upload', 'contents'),
+    State('spotify-files', 'data'),
+    State('youtube-files', 'data'),
     State('platform-selected', 'value'),
     State('year-selected', 'value')
 )
 
-def load_and_store(n_clicks, spotify_upload, youtube_upload, platforms, year):
+def load_and_store(n_clicks, spotify_files, youtube_files, platforms, year):
     if n_clicks == 0:
         return None
     
     spotify, youtube = None, None
 
-    if spotify_upload:
-        spotify = parse_contents(spotify_upload)
+    if spotify_files:
+        spotify = read_uploads(spotify_files, parse_spotify)
         spotify = clean_spotify(spotify, year=year) 
 
-    if youtube_upload:
-        youtube = parse_contents(youtube_upload)
+    if youtube_files:
+        youtube = read_uploads(youtube_files, parse_youtube)
         youtube = clean_youtube(youtube, year=year)
 
     # Filter music by platform
     music = dataframe_merge(spotify, youtube, platforms)
     if music is None or music.empty:
-        return html.Div("No data available")
+        return None
     
-    return music.to_json(date_format='iso', orient='split')
+    session = uuid.uuid4().hex
+    sessions.put(session, music)
+    return {'session': session}
 
 @app.callback(
     Output('topsongs-graph', 'children'),
@@ -279,7 +274,9 @@ def update_graphs(data, selected_year, selected_months, selected_platforms):
     if data is None:
         return None, None, None, None 
 
-    music = pd.read_json(data, orient='split')
+    music = sessions.get(data['session'])
+    if music is None: #evicted or the server restarted
+        return html.Div("Press Generate Analysis again to reload your data"), None, None, None
     
     music = music[music['date'].dt.year == int(selected_year)]
     music = music[music['platform'].isin(selected_platforms)]
@@ -301,39 +298,39 @@ def update_graphs(data, selected_year, selected_months, selected_platforms):
 @app.callback(
     Output('platform-selected', 'options'),
     Output('platform-selected', 'value'),
-    Input('spotify-upload', 'contents'),
-    Input('youtube-upload', 'contents'),
+    Input('spotify-files', 'data'),
+    Input('youtube-files', 'data'),
     prevent_initial_call=True
 )
-def update_platform_dropdown(spotify_content, youtube_content):
+def update_platform_dropdown(spotify_files, youtube_files):
     options = []
     values = []
-    if spotify_content:
+    if spotify_files:
         options.append({'label': 'Spotify', 'value': 'spotify'})
         values.append('spotify')
-    if youtube_content:
+    if youtube_files:
         options.append({'label': 'YouTube', 'value': 'youtube'})
         values.append('youtube')
     return options, values
 
 @app.callback(
     Output('spotify-upload', 'children'),
-    Input('spotify-upload', 'filename'),
+    Input('spotify-files', 'data'),
     prevent_initial_call=True
 )
-def update_spotify_upload(filename):
-    if filename:
-        return html.Div(f"Uploaded: {filename}")
+def update_spotify_upload(files):
+    if files:
+        return html.Div(f"Uploaded: {', '.join(upload['name'] for upload in files)}")
     return html.Div(['Drag and Drop or ', html.A('Select Files')])
 
 @app.callback(
     Output('youtube-upload', 'children'),
-    Input('youtube-upload', 'filename'),
+    Input('youtube-files', 'data'),
     prevent_initial_call=True
 )
-def update_youtube_upload(filename):
-    if filename:
-        return html.Div(f"Uploaded: {filename}")
+def update_youtube_upload(files):
+    if files:
+        return html.Div(f"Uploaded: {', '.join(upload['name'] for upload in files)}")
     return html.Div(['Drag and Drop or ', html.A('Select Files')])
 
 
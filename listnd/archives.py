@@ -0,0 +1,35 @@
+import fnmatch, posixpath, zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+#Export files by name, first match wins. StreamingHistory_podcast and _audiobook files share the spotify
+#folder and aren't music, older exports named the music files StreamingHistory0.json and on
+EXPORT_FILES = [('spotifyFull', 'Streaming_History_Audio*.json'), ('spotify', 'StreamingHistory_music_*.json'),
+    ('spotify', 'StreamingHistory[0-9]*.json'),
+    ('youtube', 'watch-history.json'), ('apple_history', 'Apple Music Play Activity.csv'),
+    ('apple_songs', 'Apple Music - Track Play History.csv')]
+
+def export_kind(name):
+    #Uploader kind for a file name, None for files no loader reads
+    return next((kind for kind, pattern in EXPORT_FILES if fnmatch.fnmatch(name, pattern)), None)
+
+def _members(archive):
+    #(kind, archive, member) for every export file, nested zips (Apple_Media_Services.zip) are opened in place
+    for info in archive.infolist():
+        name = posixpath.basename(info.filename)
+        if info.is_dir() or info.filename.startswith('__MACOSX/'):
+            continue
+        if name.lower().endswith('.zip'):
+            yield from _members(zipfile.ZipFile(archive.open(info)))
+        elif export_kind(name) is not None:
+            yield export_kind(name), archive, info
+
+def read_archive(file, workers=4):
+    #Uploads ({kind: [bytes]}) for the export files in a zip, only those members are decompressed.
+    #zlib releases the GIL, so members decompress in parallel on threads
+    members = sorted(_members(zipfile.ZipFile(file)), key=lambda member: member[2].filename)
+    with ThreadPoolExecutor(workers) as pool:
+        payloads = pool.map(lambda member: member[1].read(member[2]), members)
+        uploads = {}
+        for (kind, archive, info), payload in zip(members, payloads):
+            uploads.setdefault(kind, []).append(payload)
+    return uploads
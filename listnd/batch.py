@@ -0,0 +1,93 @@
+import argparse, html, json, os, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import plotly.io as pio
+from listnd.archives import export_kind, read_archive
+from listnd.ingest import load_uploads
+from listnd.report import build_report
+
+def find_exports(folder):
+    #Every export file anywhere under one person's folder, zipped or not, as the uploads load_uploads takes
+    uploads = {}
+    for root, dirs, files in os.walk(folder):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            if name.lower().endswith('.zip'):
+                for kind, payloads in read_archive(path).items():
+                    uploads.setdefault(kind, []).extend(payloads)
+            elif export_kind(name) is not None:
+                with open(path, 'rb') as export:
+                    uploads.setdefault(export_kind(name), []).append(export.read())
+    if not ('apple_history' in uploads and 'apple_songs' in uploads): #apple needs both files, like the upload page
+        uploads.pop('apple_history', None)
+        uploads.pop('apple_songs', None)
+    return uploads
+
+def write_report(report, folder, formats):
+    os.makedirs(folder, exist_ok=True)
+    if 'json' in formats:
+        sections = {section: [item if isinstance(item, str) else json.loads(pio.to_json(item)) for item in items]
+            for section, items in report.items()}
+        with open(os.path.join(folder, 'report.json'), 'w') as f:
+            json.dump(sections, f)
+    if 'html' in formats:
+        parts, plotlyjs = ['<html><head><meta charset="utf-8"><title>Listnd</title></head><body>', '<h1>Listnd</h1>'], 'cdn'
+        for section, items in report.items():
+            parts.append(f'<h2>{html.escape(section)}</h2>')
+            for item in items:
+                if isinstance(item, str): #song titles come from whoever uploaded the video, never trust them as markup
+                    parts.append(f'<pre>{html.escape(item)}</pre>')
+                else:
+                    parts.append(pio.to_html(item, full_html=False, include_plotlyjs=plotlyjs))
+                    plotlyjs = False #the library is loaded once per page
+        parts.append('</body></html>')
+        with open(os.path.join(folder, 'report.html'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(parts))
+
+def report_user(task):
+    #One person's folder to report files, runs in a worker so files are loaded one after another
+    folder, out, formats = task
+    uploads = find_exports(folder)
+    if not uploads:
+        raise ValueError(f"No export files in {folder}")
+    frames = load_uploads(uploads, workers=1)
+    write_report(build_report(frames), out, formats)
+    return sum(len(frame) for frame in frames.values())
+
+def report_folders(folders, out):
+    #OUT/<folder name> per person, with -2, -3... added when two folders share a name (a/me and b/me)
+    names, taken = [], set()
+    for folder in folders:
+        base = name = os.path.basename(os.path.normpath(folder))
+        count = 1
+        while name in taken:
+            count += 1
+            name = f'{base}-{count}'
+        taken.add(name)
+        names.append(os.path.join(out, name))
+    return names
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m listnd', description="Write Listnd reports for folders of exported listening history, one folder per person.")
+    parser.add_argument('folders', nargs='+', help="one folder per person, searched recursively for export files")
+    parser.add_argument('-o', '--out', default='reports', help="reports go to OUT/<folder name>/, or OUT/<folder name>-2/ for a repeated name (default: reports)")
+    parser.add_argument('-f', '--format', action='append', choices=['html', 'json'], help="repeat for both (default: html and json)")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1, help="people reported at once (default: CPU count)")
+    args = parser.parse_args(argv)
+    formats = args.format or ['html', 'json']
+
+    tasks = [(folder, out, formats) for folder, out in zip(args.folders, report_folders(args.folders, args.out))]
+    start, done, failed = time.perf_counter(), 0, 0
+    with ProcessPoolExecutor(max(1, min(args.workers, len(tasks)))) as pool:
+        futures = {pool.submit(report_user, task): task[0] for task in tasks}
+        for future in as_completed(futures):
+            try:
+                plays = future.result()
+            except Exception as error: #one broken export shouldn't stop the batch
+                failed += 1
+                print(f"{futures[future]}: failed, {error}")
+                continue
+            done += 1
+            print(f"{futures[future]}: {plays} plays")
+    elapsed = time.perf_counter() - start
+    print(f"{done} reports in {elapsed:.1f} s ({60 * done / elapsed:.1f} users/minute), {failed} failed")
+    return 1 if failed else 0
@@ -0,0 +1,81 @@
+import hashlib, os, pickle, threading
+from collections import OrderedDict
+from listnd.cleaners import CLEANER_VERSION
+
+def content_key(kind, payload):
+    #Same bytes through the same cleaner version always give the same frame
+    return f"{kind}-v{CLEANER_VERSION}-{hashlib.sha256(payload).hexdigest()}"
+
+def combined_key(kind, keys):
+    return f"{kind}-v{CLEANER_VERSION}-" + hashlib.sha256('|'.join(keys).encode()).hexdigest()
+
+class FrameCache:
+    #LRU of cleaned frames bounded by memory, with spill_dir set frames are also written to disk
+    #so evicted ones (or ones from an earlier run) load back without reparsing. The spilled files
+    #are bounded too (max_spill_bytes, least recently used go first). One instance serves every
+    #session's thread, the LRU only changes under a lock
+    def __init__(self, max_bytes=512 * 2**20, spill_dir=None, max_spill_bytes=None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_spill_bytes = 4 * max_bytes if max_spill_bytes is None else max_spill_bytes
+        self.frames = OrderedDict() #key -> (frame, bytes)
+        self.size = 0
+        self._lock = threading.Lock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, key + '.pkl')
+
+    def get(self, key):
+        with self._lock:
+            if key in self.frames:
+                self.frames.move_to_end(key)
+                return self.frames[key][0]
+        if self.spill_dir:
+            try:
+                with open(self._spill_path(key), 'rb') as f:
+                    frame = pickle.load(f)
+                os.utime(self._spill_path(key)) #recently used, pruned last
+            except FileNotFoundError: #never spilled, or pruned meanwhile
+                return None
+            self.put(key, frame, spilled=True)
+            return frame
+        return None
+
+    def put(self, key, frame, spilled=False):
+        nbytes = int(frame.memory_usage(deep=True).sum())
+        if self.spill_dir and not spilled:
+            path = self._spill_path(key)
+            with open(f'{path}.{threading.get_ident()}.tmp', 'wb') as f:
+                pickle.dump(frame, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f.name, path) #readers never see half a file
+            self._prune_spill()
+        with self._lock:
+            if key in self.frames:
+                self.size -= self.frames.pop(key)[1]
+            self.frames[key] = (frame, nbytes)
+            self.size += nbytes
+            while self.size > self.max_bytes and len(self.frames) > 1:
+                _, (_, dropped) = self.frames.popitem(last=False) #least recently used
+                self.size -= dropped
+
+    def _prune_spill(self):
+        #Delete the least recently used spilled frames until the rest fit in max_spill_bytes
+        files = []
+        for entry in os.scandir(self.spill_dir):
+            if entry.name.endswith('.pkl'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError: #another thread pruned it
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_spill_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -0,0 +1,183 @@
+import os, re, unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from listnd.dedup import NOT_WORD, PLATFORM_PRIORITY, platform_ranks
+
+#Artist and title both at least this similar (difflib ratio, 0-1) after normalizing are the same track
+NAME_THRESHOLD = 0.88
+#Words (and word starts) shared by more names than this say nothing about a match, their blocks are skipped
+MAX_BLOCK = 100
+DIGITS = re.compile(r'\d+')
+APOSTROPHES = re.compile(r"['’`]")
+FEATURED = re.compile(r'[\(\[]\s*(feat|ft|featuring|with)\b[^\)\]]*[\)\]]|\s(feat|ft|featuring)\b[^\(\[]*')
+
+MAPPING_COLUMNS = ['artist', 'title', 'canonArtist', 'canonTitle']
+#Bumped when name_key or the matching changes, mappings saved by another version are learned again
+NAMES_VERSION = b'2'
+
+def name_key(value):
+    #Lighter than dedup.normalize_name: case, accents, punctuation and featured artists go but brackets and
+    #version suffixes stay, 'Love Story (Taylor's Version)' and a remix aren't the original song
+    if not isinstance(value, str):
+        return ''
+    value = unicodedata.normalize('NFKD', value.casefold())
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    value = FEATURED.sub(' ', APOSTROPHES.sub('', value))
+    return NOT_WORD.sub(' ', value.replace('&', ' and ')).strip()
+
+def similar(a, b, threshold):
+    #Cheap upper bounds first, most candidate pairs stop there
+    matcher = SequenceMatcher(None, a, b)
+    return matcher.real_quick_ratio() >= threshold and matcher.quick_ratio() >= threshold and matcher.ratio() >= threshold
+
+def title_blocks(title):
+    #Blocking index: a normalized title is listed under each of its words and each word's first three
+    #letters, only titles sharing a block are compared instead of every pair of titles
+    blocks = set()
+    for word in title.split():
+        blocks.add(word)
+        if len(word) > 3 and not word.isdigit():
+            blocks.add('~' + word[:3]) #catches typos and plurals at the end of a word
+    return blocks
+
+class TrackNames:
+    #Mapping of every (artist, title) seen to the (artist, title) it is counted under, so the same
+    #song spelled differently by each platform is one song. With a path the mapping is kept in an
+    #Arrow file. The normalized names and blocking index are kept too, each call only compares
+    #the names it hasn't seen before
+    def __init__(self, path=None, threshold=NAME_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self._mapping = None
+        self._keys = None
+
+    def mapping(self):
+        if self._mapping is None:
+            self._mapping = {}
+            if self.path is not None and os.path.exists(self.path):
+                table = feather.read_table(self.path)
+                if (table.schema.metadata or {}).get(b'listnd.names') == NAMES_VERSION:
+                    self._mapping = {(artist, title): (canon_artist, canon_title) for artist, title, canon_artist, canon_title
+                        in table.to_pandas()[MAPPING_COLUMNS].itertuples(index=False)}
+        return self._mapping
+
+    def _save(self):
+        rows = [key + value for key, value in self.mapping().items()]
+        table = pa.Table.from_pandas(pd.DataFrame(rows, columns=MAPPING_COLUMNS), preserve_index=False)
+        table = table.replace_schema_metadata({b'listnd.names': NAMES_VERSION})
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        feather.write_feather(table, self.path + '.tmp', compression='uncompressed')
+        os.replace(self.path + '.tmp', self.path) #never leave half a mapping behind
+
+    def _key(self, pair, touched=None):
+        #Id of the pair's normalized (artist, title), new keys join the blocking index and their blocks are added to touched
+        for name in pair:
+            if name not in self._normalized:
+                self._normalized[name] = name_key(name)
+        key = (self._normalized[pair[0]], self._normalized[pair[1]])
+        if key not in self._keys:
+            self._keys[key] = len(self._key_list)
+            self._key_list.append(key)
+            self._digits.append((DIGITS.findall(key[0]), DIGITS.findall(key[1])))
+            self._members.append([])
+            blocks = title_blocks(key[1])
+            for block in blocks:
+                self._blocks[block].append(self._keys[key])
+            if touched is not None:
+                touched |= blocks
+        return self._keys[key]
+
+    def _index(self):
+        #Built from the mapping once, then grown by learn
+        if self._keys is None:
+            self._keys, self._key_list, self._digits, self._members = {}, [], [], []
+            self._normalized, self._blocks = {}, defaultdict(list)
+            for pair in self.mapping():
+                self._members[self._key(pair)].append(pair)
+
+    def _common_words(self, key):
+        #Title words other titles share, a typo is usually a word no other title has
+        return sum(len(self._blocks[word]) > 1 for word in self._key_list[key][1].split())
+
+    def learn(self, plays, ranks=None):
+        #plays counts plays per (artist, title), ranks is the best PLATFORM_PRIORITY rank each was played on.
+        #Names not in the mapping yet are matched against every known name, a group of new names with no
+        #known one is named after its most played spelling, on ties the one from the best platform, then
+        #the one whose words are more common. Returns how many new names were mapped to another spelling
+        mapping = self.mapping()
+        plays = plays.to_dict()
+        ranks = {} if ranks is None else ranks.to_dict()
+        fresh = [pair for pair in plays if pair not in mapping and isinstance(pair[0], str) and isinstance(pair[1], str)]
+        if not fresh:
+            return 0
+        self._index()
+
+        #Names equal once normalized need no comparing, the fuzzy match runs on the keys new to this call
+        first_new, touched = len(self._key_list), set()
+        fresh_keys = [self._key(pair, touched) for pair in fresh]
+        parent, linked = list(range(len(self._key_list))), set()
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        for block in touched:
+            members = self._blocks[block]
+            if len(members) > MAX_BLOCK:
+                continue
+            for j, b in enumerate(members):
+                if b < first_new: #known names were settled in an earlier call, members are in key order
+                    continue
+                for a in members[:j]:
+                    if self._digits[a] != self._digits[b] or find(a) == find(b): #numbers must match, 'Part 1' and 'Part 2' are different songs
+                        continue
+                    (artist_a, title_a), (artist_b, title_b) = self._key_list[a], self._key_list[b]
+                    if similar(title_a, title_b, self.threshold) and similar(artist_a, artist_b, self.threshold):
+                        parent[find(a)] = find(b)
+                        linked |= {a, b}
+
+        #Known names keep their mapping, new ones join the preferred known name in their group
+        groups = defaultdict(lambda: ([], []))
+        for key in linked | set(fresh_keys):
+            groups[find(key)][0].extend((pair, key) for pair in self._members[key])
+        for pair, key in zip(fresh, fresh_keys):
+            groups[find(key)][1].append((pair, key))
+        preferred = lambda member: (-plays.get(member[0], 0), ranks.get(member[0], len(PLATFORM_PRIORITY)), -self._common_words(member[1]), member[0])
+        renamed = 0
+        for old, new in groups.values():
+            if not new:
+                continue
+            canon = mapping[min(old, key=preferred)[0]] if old else min(new, key=preferred)[0]
+            for pair, key in new:
+                mapping[pair] = canon
+                renamed += pair != canon
+                self._members[key].append(pair)
+        if self.path is not None:
+            self._save()
+        return renamed
+
+    def canonicalize(self, music):
+        #music with every (artist, title) replaced by the one it is counted under, returns
+        #the renamed plays and how many names were merged into another spelling
+        ranks = music.assign(rank=platform_ranks(music['platform'])).groupby(['artist', 'title'], observed=True)['rank']
+        plays = ranks.size()
+        renamed = self.learn(plays, ranks.min())
+        mapping = self.mapping()
+        if not renamed and all(mapping.get(pair, pair) == pair for pair in plays.index):
+            return music, 0
+        #Renamed once per distinct pair of category codes, then spread back over the rows
+        artists, titles = music['artist'].cat.categories.tolist(), music['title'].cat.categories.tolist()
+        width = len(titles) + 1
+        pairs, uniques = pd.factorize((music['artist'].cat.codes.to_numpy('int64') + 1) * width + music['title'].cat.codes.to_numpy('int64') + 1)
+        canon = []
+        for code in uniques:
+            artist, title = code // width - 1, code % width - 1
+            pair = (artists[artist] if artist >= 0 else None, titles[title] if title >= 0 else None)
+            canon.append(mapping.get(pair, pair))
+        music = music.copy()
+        music['artist'] = pd.Categorical([artist for artist, title in canon])[pairs]
+        music['title'] = pd.Categorical([title for artist, title in canon])[pairs]
+        return music, sum(1 for pair in plays.index if mapping.get(pair, pair) != pair)
@@ -0,0 +1,42 @@
+import pandas as pd
+import plotly.express as px
+from listnd.features import DAY_NAMES, HOUR_LABELS
+
+#Charts over the whole history are drawn from counts binned here, so the figure JSON
+#holds one value per bin instead of one per play. The figures take totals, which can come from
+#day_totals over any frame or from summed cube partitions.
+
+def _totals(frame, keys, value):
+    grouped = frame.groupby(keys, observed=True)
+    return grouped.size() if value is None else grouped[value].sum()
+
+def day_totals(frame, value=None):
+    #value='plays' for a cube, None counts rows
+    return _totals(frame, ['platform', 'date'], value)
+
+def hour_grid(totals):
+    #Plays per weekday x hour as a full 7x24 table
+    grid = totals.unstack('hour').reindex(index=range(7), columns=range(24)).fillna(0)
+    grid.index, grid.columns = DAY_NAMES, HOUR_LABELS
+    return grid
+
+def platform_timeline(totals, freq=None):
+    #Plays per platform per day, or per week (starting Monday) once the history spans more than half a year
+    days = totals.reset_index(name='plays')
+    if freq is None:
+        freq = 'W' if days['date'].max() - days['date'].min() > pd.Timedelta(days=183) else 'D'
+    if freq == 'W':
+        days['date'] = days['date'].dt.to_period('W-SUN').dt.start_time
+    return days.groupby(['platform', 'date'], observed=True)['plays'].sum().reset_index()
+
+def hours_figure(totals):
+    fig = px.imshow(hour_grid(totals), aspect='auto', labels={'x': 'Hour', 'y': 'Day of the Week', 'color': 'plays'},
+                    title="Music Listening Through the Week")
+    fig.update_layout(yaxis_title="Day of the Week", xaxis_title="Hour")
+    return fig
+
+def platform_figure(totals):
+    fig = px.bar(platform_timeline(totals), x='date', y='plays', color='platform', barmode='stack',
+                 title='Platforms Used Throughout The Year')
+    fig.update_layout(xaxis_title='date', yaxis_title='songs', bargap=0)
+    return fig
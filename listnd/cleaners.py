@@ -0,0 +1,170 @@
+import re
+import numpy as np
+import pandas as pd
+from functools import reduce
+from io import StringIO
+from listnd.dedup import dedupe_plays
+from listnd.features import add_time_features
+from listnd.matching import ArtistMatcher, build_title_pattern, TITLE_CUTS
+
+CLEANER_VERSION = 7 #bump whenever a cleaner's output changes, cached frames are keyed on it
+
+def parse_json(contents):
+    stringio = StringIO(contents.getvalue().decode("utf-8"))
+    return pd.read_json(stringio)
+
+def parse_csv(contents):
+    return pd.read_csv(contents)
+
+
+def clean_spotify(spotify): 
+    #Convert spotify endTime to datetime
+    spotify['endTime'] = pd.to_datetime(spotify['endTime']) 
+    spotify = add_time_features(spotify, 'endTime')
+    spotify['ts'] = spotify['endTime']
+    spotify.rename(columns={'artistName': 'artist', 'trackName': 'title'}, inplace=True) #rename columns
+    return as_categories(spotify)
+
+def clean_spotifyFull(spotifyF): 
+    #Convert spotifyFull ts to datetime
+    spotifyF['ts'] = pd.to_datetime(spotifyF['ts']) 
+    spotifyF = add_time_features(spotifyF, 'ts')
+    spotifyF.rename(columns={'master_metadata_album_artist_name': 'artist', 'master_metadata_track_name': 'title', 'ms_played':'msPlayed'}, inplace=True)
+    return as_categories(spotifyF)
+
+def merge_spotify(spotify, spotifyFull):
+    #Both exports overlap for the last year, keep every play once and the extended copy when both have it
+    basic, full = unify(spotify, 'spotify'), unify(spotifyFull, 'spotify')
+    origin = np.repeat(np.array([0, 1], dtype='int8'), [len(full), len(basic)])
+    return dedupe_plays(concat_plays([full, basic]), origin=origin)[0]
+
+def clean_youtube(youtube):
+    return find_youtube_artists(clean_youtube_rows(youtube))
+
+def clean_youtube_rows(youtube):
+    #Clean Youtube, everything here only looks at one row so it can run per file
+    youtube = youtube[youtube['header']=='YouTube Music'] #only take data from youtube music 
+    youtube = youtube.drop(['titleUrl', 'products', 'activityControls', 'description', 'details', 'header'], axis=1, errors='ignore')
+    #Convert youtube ListTime to datetime
+    youtube['ListTime'] = pd.to_datetime(youtube['time'], errors='coerce', utc=True)
+    youtube = add_time_features(youtube, 'ListTime') #a play with no time can't be placed on any chart
+    youtube['ts'] = youtube['ListTime']
+
+    #Clean Youtube Song Titles
+    def delete_watched(value): #Eliminate 'Watched' from song titles
+        pattern = r'^Watched '
+        if re.match(pattern, value):
+            cleaned = re.sub(r'^Watched ', '', value)
+            return cleaned
+    youtube['title'] = youtube['title'].apply(delete_watched) 
+
+    #Get artist names from list in subtitles
+    youtube = youtube[~youtube['subtitles'].apply(lambda x: isinstance(x, float))] #drop float rows
+    def get_name(value): #Index artist names 
+        return value[0]['name']
+    youtube['artist'] = youtube['subtitles'].apply(get_name) #Make artist column 
+
+    #Delete '- Topic' in Title 
+    def delete_topic(value): 
+        pattern = r'.*\- Topic$'
+        if re.match(pattern, value):
+            cleaned = re.sub(r' \- Topic', '', value)
+            return cleaned, True #add cleaned_flag for songs with author
+        else: return value, False
+    youtube[['artist', 'cleaned_flag']] = youtube['artist'].apply(delete_topic).apply(pd.Series)
+
+    #Eliminate random characters from titles and artists
+    youtube['title'] = youtube['title'].str.replace(r"[•·]", " ", regex=True)
+    youtube['artist'] = youtube['artist'].str.replace(r"[•·]", " ", regex=True)
+    return youtube
+
+def find_youtube_artists(youtube):
+    #Needs every file of the upload, the artist list comes from all '- Topic' channels
+    artists = youtube[youtube['cleaned_flag']==True]['artist'].unique() #Create list of clean artists
+    sorted_artists = sorted(artists, key=len, reverse=True) #sort greatest to shortest to match longest
+    
+    #Find artist from artist name in title, longest artist wins
+    matcher = ArtistMatcher(sorted_artists)
+    unflagged = ~youtube['cleaned_flag']
+    found = matcher.find(youtube.loc[unflagged, 'title'])
+    found = found[found.notna()] #change artist if found in title
+    youtube.loc[found.index, 'artist'] = found
+
+    #Clean random words from song title, artists and cut phrases in one pass
+    title_pattern = build_title_pattern(artists, TITLE_CUTS)
+    youtube['title'] = youtube['title'].str.replace(title_pattern, '', regex=True).str.strip()
+
+    return as_categories(youtube)
+
+def clean_apple(history, songs):
+    return merge_apple(clean_apple_history(history), clean_apple_songs(songs))
+
+def clean_apple_history(history):
+    #Convert apple startTime to datetime
+    history['startTime'] = pd.to_datetime(history['Event Start Timestamp'], format='ISO8601') 
+    history = add_time_features(history, 'startTime')
+
+    #Take and rename needed apple columns
+    history = history[['Song Name', 'startTime', 'date', 'month', 'hour', 'weekday', 'yearMonth', 'year','Media Duration In Milliseconds']].copy()
+    history.rename(columns={'Song Name': 'title', 'startTime': 'ts', 'Media Duration In Milliseconds': 'msPlayed'}, inplace=True)
+    return history
+
+#Track Play History columns used to pick between artists sharing a title, when the export has them
+APPLE_SONG_RANKS = {'Play Duration Milliseconds': 'duration', 'Last Played Date': 'lastPlayed'}
+
+def clean_apple_songs(songs):
+    #Separate song titles and artists 
+    songs[['artist', 'title']] = songs['Track Name'].str.extract(r'^\s*(.*?)\s*-\s*(.*)$')
+    ranks = [column for column in APPLE_SONG_RANKS if column in songs]
+    return songs[['artist', 'title'] + ranks].rename(columns=APPLE_SONG_RANKS)
+
+def apple_title_index(songs):
+    #One artist per title so a play can never match twice: the artist with the most rows for it,
+    #then the most time played, then the latest play, then alphabetical
+    songs = songs.dropna(subset=['artist', 'title'])
+    measures = {'rows': ('title', 'size')}
+    if 'duration' in songs:
+        measures['duration'] = ('duration', 'sum')
+    if 'lastPlayed' in songs:
+        measures['lastPlayed'] = ('lastPlayed', 'max')
+    ranked = songs.groupby(['title', 'artist'], observed=True).agg(**measures).reset_index()
+    ranked = ranked.sort_values(['title'] + list(measures) + ['artist'], ascending=[True] + [False] * len(measures) + [True])
+    return ranked.drop_duplicates('title').set_index('title')['artist']
+
+def merge_apple(history, songs):
+    #A lookup into a unique index keeps exactly one row per play, a join on title could fan out
+    apple = history.copy()
+    apple['artist'] = apple['title'].map(apple_title_index(songs)).fillna('Unknown')
+    return as_categories(apple)
+
+#Column layout shared by every platform once merged, hour and weekday are 0-23 and 0-6 (Monday)
+MERGED_COLUMNS = ['artist', 'title', 'ts', 'date', 'hour', 'weekday', 'month', 'yearMonth', 'year', 'msPlayed', 'platform']
+#Repeated strings are stored once as categories, the rows only hold integer codes
+CATEGORY_COLUMNS = ['artist', 'title', 'platform']
+
+def as_categories(frame):
+    for column in CATEGORY_COLUMNS:
+        if column in frame and not isinstance(frame[column].dtype, pd.CategoricalDtype):
+            frame[column] = frame[column].astype('category')
+    return frame
+
+def concat_plays(frames):
+    #pd.concat falls back to plain strings when categories differ, so give every frame the same ones first
+    frames = list(frames)
+    for column in CATEGORY_COLUMNS:
+        columns = [frame[column] for frame in frames if column in frame]
+        if len(columns) > 1 and all(isinstance(values.dtype, pd.CategoricalDtype) for values in columns):
+            categories = reduce(lambda a, b: a.union(b), [values.cat.categories for values in columns])
+            frames = [frame.assign(**{column: frame[column].cat.set_categories(categories)}) if column in frame else frame for frame in frames]
+    return pd.concat(frames, ignore_index=True)
+
+def unify(frame, platform):
+    #One platform's cleaned frame in the merged layout, frames already in it pass through
+    if 'platform' in frame:
+        return as_categories(frame[MERGED_COLUMNS].copy())
+    unified = frame.reindex(columns=MERGED_COLUMNS) #youtube has no msPlayed, it stays empty
+    if unified['ts'].dt.tz is not None:
+        unified['ts'] = unified['ts'].dt.tz_convert(None) #every export is in UTC
+    unified['msPlayed'] = unified['msPlayed'].astype('float64')
+    unified['platform'] = pd.Categorical.from_codes(np.zeros(len(unified), dtype='int8'), [platform])
+    return as_categories(unified)
@@ -0,0 +1,77 @@
+import pandas as pd
+from listnd.cleaners import concat_plays
+from listnd.dedup import platform_bits
+
+#Every chart can be answered by summing over some of these keys
+CUBE_KEYS = ['platform', 'year', 'month', 'yearMonth', 'date', 'hour', 'weekday', 'artist', 'title']
+
+def build_cube(music):
+    #One groupby over the merged plays: play count, plays with a duration, and ms played per key
+    cube = music.groupby(CUBE_KEYS, observed=True, dropna=False, sort=False).agg(
+        plays=('platform', 'size'), timed=('msPlayed', 'count'), msPlayed=('msPlayed', 'sum'))
+    return cube.reset_index()
+
+def rollup(cube, keys, value='plays'):
+    #Sum a cube measure over the given keys, rows with a missing key drop out like a plain groupby
+    return cube.groupby(keys, observed=True)[value].sum()
+
+def timed(cube):
+    #Cube rows for plays that have a duration (youtube has none)
+    return cube[(cube['timed'] > 0) & cube['artist'].notna() & cube['title'].notna()]
+
+#Play-level columns kept for every partition, for the analyses that need each play's time
+PLAY_COLUMNS = ['ts', 'artist', 'title']
+#Rollups kept for every (platform, year) partition, the charts over a selection sum only these
+PARTIAL_KEYS = {'songs': ['title', 'artist'], 'artists': ['artist'], 'artistMonths': ['artist', 'yearMonth'],
+    'days': ['platform', 'date'], 'hours': ['weekday', 'hour'], 'artistDays': ['artist', 'date'],
+    'titleDays': ['date', 'title'], 'titleMonths': ['title', 'yearMonth'], 'monthArtists': ['month', 'artist'],
+    'monthTitles': ['month', 'title']}
+#Rollups of the plays with a duration, ms played and how many plays
+TIMED_KEYS = {'artistMinutes': ['artist']}
+
+class PartitionedCube:
+    #The cube split by platform, year and which better platforms have a copy of the play (shadowedBy
+    #from mark_copies), built once per set of plays. Only the rollups of each partition are kept,
+    #changing the platform or year selection sums those of the partitions it covers instead of
+    #refiltering every play, and a copy is left out only when the platform it loses to is selected too.
+    def __init__(self, music):
+        self.parts = {}
+        if 'shadowedBy' not in music:
+            music = music.assign(shadowedBy=0)
+        for key, plays in music.groupby(['platform', 'year', 'shadowedBy'], observed=True):
+            cube = build_cube(plays)
+            partials = {name: rollup(cube, keys) for name, keys in PARTIAL_KEYS.items()}
+            partials.update({name: rollup(timed(cube), keys, ['msPlayed', 'timed']) for name, keys in TIMED_KEYS.items()})
+            self.parts[key] = dict(partials, plays=plays[PLAY_COLUMNS], rows=len(plays))
+
+    def years(self, platforms):
+        return sorted({year for platform, year, shadowed in self.parts if platform in platforms})
+
+    def _covered(self, platforms, years):
+        return [(key, part) for key, part in self.parts.items() if key[0] in platforms and key[1] in years]
+
+    def _selected(self, name, platforms, years):
+        bits = platform_bits(platforms)
+        return [part[name] for (platform, year, shadowed), part in self._covered(platforms, years) if not shadowed & bits]
+
+    def shadowed(self, platforms, years):
+        #Plays per platform left out of the selection because a selected platform has the same play
+        bits, counts = platform_bits(platforms), {}
+        for (platform, year, shadowed), part in self._covered(platforms, years):
+            if shadowed & bits:
+                counts[platform] = counts.get(platform, 0) + part['rows']
+        return counts
+
+    def plays(self, platforms, years):
+        #The selected plays themselves, in no particular order
+        parts = self._selected('plays', platforms, years)
+        return concat_plays(parts) if parts else None
+
+    def total(self, name, platforms, years):
+        #One of PARTIAL_KEYS or TIMED_KEYS summed over the selection, platforms can share titles, artists and hours across partitions
+        parts = self._selected(name, platforms, years)
+        if not parts:
+            return None
+        if len(parts) == 1:
+            return parts[0]
+        return pd.concat(parts).groupby(level={**PARTIAL_KEYS, **TIMED_KEYS}[name], observed=True).sum()
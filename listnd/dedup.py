@@ -0,0 +1,104 @@
+import re, unicodedata
+import numpy as np
+import pandas as pd
+
+#Plays of one track starting closer together than this, from different files or platforms, are the same play
+DEDUP_WINDOW = pd.Timedelta(seconds=90)
+#Platforms whose ts is when the play ended, those plays started msPlayed earlier
+ENDS_AT_TS = ['spotify']
+#Which copy of a play found on several platforms is kept, first one wins
+PLATFORM_PRIORITY = ['spotify', 'apple', 'youtube']
+
+BRACKETS = re.compile(r'[\(\[][^\)\]]*[\)\]]')
+FEATURING = re.compile(r'\s(feat|ft|featuring)\b.*$')
+VERSION = re.compile(r'\s-\s.*\b(remaster(ed)?|version|edit|live|mono|stereo)\b.*$')
+NOT_WORD = re.compile(r'[\W_]+')
+
+def normalize_name(value):
+    #Lowercase, no accents, brackets, featured artists, version suffixes or punctuation, so
+    #'Beyoncé - Halo (Remastered)' and 'beyonce  halo' give the same key
+    if not isinstance(value, str):
+        return None
+    value = unicodedata.normalize('NFKD', value.casefold())
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    value = FEATURING.sub('', VERSION.sub('', BRACKETS.sub(' ', value)))
+    key = NOT_WORD.sub(' ', value.replace('&', ' and ')).strip()
+    return key or None
+
+def name_ids(values):
+    #Integer id per normalized name, -1 when there is none. Normalized once per distinct name
+    values = values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype('category')
+    ids = pd.factorize(pd.Series([normalize_name(name) for name in values.cat.categories], dtype=object))[0]
+    ids = np.append(ids, -1) #missing values have code -1, which picks this
+    return ids[values.cat.codes.to_numpy()]
+
+def track_ids(music):
+    #One int64 per (normalized artist, normalized title), -1 for plays missing either
+    artists, titles = name_ids(music['artist']), name_ids(music['title'])
+    ids = artists.astype('int64') * (titles.max(initial=0) + 1) + titles
+    ids[(artists < 0) | (titles < 0)] = -1
+    return ids
+
+def play_starts(music):
+    #ts as int64 nanoseconds, moved back to the start of the play where ts is its end
+    starts = music['ts'].to_numpy(dtype='datetime64[ns]').view('int64').copy()
+    ends = music['platform'].isin(ENDS_AT_TS).to_numpy() & music['msPlayed'].notna().to_numpy()
+    starts[ends] -= (music['msPlayed'].to_numpy()[ends] * 10**6).astype('int64')
+    return starts
+
+def platform_ranks(platforms):
+    order = {platform: rank for rank, platform in enumerate(PLATFORM_PRIORITY)}
+    return platforms.map(lambda platform: order.get(platform, len(order))).astype('int64').to_numpy()
+
+def platform_bits(platforms):
+    #Bit mask of platforms, bit n is PLATFORM_PRIORITY[n] like in the masks compare_copies gives
+    return sum(1 << PLATFORM_PRIORITY.index(platform) for platform in set(platforms) if platform in PLATFORM_PRIORITY)
+
+def compare_copies(music, window=DEDUP_WINDOW, origin=None):
+    #One sort-merge pass over merged-layout plays ordered by (track, start). Plays of a track whose
+    #starts chain together within window form a group, copies from one origin (platform priority by
+    #default, lower is better) are separate plays unless they start at the same moment, like a play in
+    #two overlapping exports. Returns, in row order, whether a row repeats one from its own origin and
+    #a bit mask of the better origins (bit n for origin n) that have a copy of it
+    origin = platform_ranks(music['platform']) if origin is None else np.asarray(origin, dtype='int64')
+    tracks, starts = track_ids(music), play_starts(music)
+    order = np.lexsort((origin, starts, tracks))
+    tracks, starts, origin = tracks[order], starts[order], origin[order]
+
+    same = np.zeros(len(order), dtype=bool)
+    same[1:] = (tracks[1:] == tracks[:-1]) & (tracks[1:] >= 0)
+    gaps = np.diff(starts, prepend=starts[:1])
+    group_starts = ~same | (gaps > window.value)
+    groups = np.cumsum(group_starts) - 1
+    bits = np.left_shift(1, origin)
+    origins = np.bitwise_or.reduceat(bits, np.flatnonzero(group_starts))[groups] if len(order) else bits
+    repeated = same & (gaps == 0)
+    repeated[1:] &= origin[1:] == origin[:-1]
+
+    repeats, better = np.zeros(len(order), dtype=bool), np.zeros(len(order), dtype='int64')
+    repeats[order], better[order] = repeated, origins & (bits - 1)
+    return repeats, better
+
+def _counts(music, rows):
+    dropped = music.loc[rows, 'platform'].value_counts()
+    return {platform: int(count) for platform, count in dropped.items() if count}
+
+def dedupe_plays(music, window=DEDUP_WINDOW, origin=None):
+    #Only the copies from each group's best origin are kept, see compare_copies.
+    #Returns the kept plays in their original order and how many were dropped per platform
+    if music.empty:
+        return music, {}
+    repeats, better = compare_copies(music, window, origin)
+    drop = repeats | (better != 0)
+    return music[~drop].reset_index(drop=True), _counts(music, drop)
+
+def mark_copies(music, window=DEDUP_WINDOW):
+    #Which platforms are shown is only known later, so a copy of a play on a better platform isn't
+    #dropped here: it gets the mask of those platforms in shadowedBy and is left out of a selection
+    #that has one of them. Repeats from the same platform are dropped, returns the plays and their counts
+    if music.empty:
+        return music.assign(shadowedBy=np.zeros(0, dtype='int8')), {}
+    repeats, better = compare_copies(music, window)
+    kept = music[~repeats].reset_index(drop=True)
+    kept['shadowedBy'] = better[~repeats].astype('int8')
+    return kept, _counts(music, repeats)
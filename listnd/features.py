@@ -0,0 +1,28 @@
+#Display labels, looked up by the integer hour (0-23) and weekday (0-6, Monday first) only when drawing
+HOUR_LABELS = ['12 AM', '1 AM', '2 AM', '3 AM', '4 AM', '5 AM','6 AM', '7 AM', '8 AM', '9 AM', '10 AM', '11 AM',
+    '12 PM', '1 PM', '2 PM', '3 PM', '4 PM', '5 PM','6 PM', '7 PM', '8 PM', '9 PM', '10 PM', '11 PM']
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+NS_PER_HOUR = 3600 * 10**9
+NS_PER_DAY = 24 * NS_PER_HOUR
+
+def add_time_features(frame, column):
+    #date/hour/weekday/month/yearMonth/year for every cleaner, worked out from the int64
+    #nanoseconds instead of formatting a string per row. Times are UTC, rows with no time are dropped.
+    times = frame[column]
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert(None)
+    if times.isna().any():
+        frame = frame[times.notna().to_numpy()].copy()
+        times = times.dropna()
+    ns = times.to_numpy(dtype='datetime64[ns]').view('int64')
+
+    days = ns // NS_PER_DAY #floor division, so times before 1970 land on the right day too
+    months = days.astype('datetime64[D]').astype('datetime64[M]').view('int64') #months since 1970-01
+    frame['date'] = days.astype('datetime64[D]').astype('datetime64[s]')
+    frame['hour'] = (ns // NS_PER_HOUR % 24).astype('int8')
+    frame['weekday'] = ((days + 3) % 7).astype('int8') #1970-01-01 was a Thursday
+    frame['month'] = (months % 12 + 1).astype('int8')
+    frame['year'] = (months // 12 + 1970).astype('int16')
+    frame['yearMonth'] = months.astype('datetime64[M]').astype('datetime64[s]')
+    return frame
@@ -0,0 +1,131 @@
+import os, pickle, subprocess, sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+from listnd.cleaners import (parse_json, parse_csv, clean_spotify, clean_spotifyFull, clean_youtube_rows,
+    find_youtube_artists, clean_apple_history, clean_apple_songs, merge_apple, merge_spotify, concat_plays)
+from listnd.parsing import parse_apple_history, parse_spotifyFull
+from listnd.cache import content_key, combined_key
+from listnd.profiling import StageTimer
+from listnd.worker import ROOT
+
+#Parser and row-local cleaner for one uploaded file, keyed by uploader
+FILE_LOADERS = {'spotify': (parse_json, clean_spotify),
+    'spotifyFull': (parse_spotifyFull, clean_spotifyFull), #streams only the columns we use
+    'youtube': (parse_json, clean_youtube_rows),
+    'apple_history': (parse_apple_history, clean_apple_history), #only 3 of its 100+ columns
+    'apple_songs': (parse_csv, clean_apple_songs)}
+
+#Uploaders feeding each platform's frame
+PLATFORM_KINDS = {'spotify': ['spotify', 'spotifyFull'], 'youtube': ['youtube'], 'apple': ['apple_history', 'apple_songs']}
+
+def _platform(kind):
+    return next(platform for platform, kinds in PLATFORM_KINDS.items() if kind in kinds)
+
+def load_file(task, timer=None):
+    kind, payload = task
+    parse, clean = FILE_LOADERS[kind]
+    timer = timer or StageTimer()
+    return timer.run(clean.__name__, clean, timer.run(f'parse {kind}', parse, BytesIO(payload)))
+
+def _load_profiled(task, memory=False):
+    #The worker's records travel back with its frame
+    timer = StageTimer(enabled=True, memory=memory)
+    return load_file(task, timer), timer.records
+
+def _in_worker(load, task):
+    #Runs load(task) in a listnd.worker process. Not a multiprocessing pool: forking the threaded server can
+    #deadlock and copies all its memory, and spawn reruns the streamlit launcher, which imports streamlit.py
+    worker = subprocess.run([sys.executable, '-m', 'listnd.worker'], input=pickle.dumps((load, task), protocol=pickle.HIGHEST_PROTOCOL),
+        stdout=subprocess.PIPE, cwd=ROOT)
+    if worker.returncode:
+        raise RuntimeError(f"The worker loading a {task[0]} file exited with code {worker.returncode}")
+    error, result = pickle.loads(worker.stdout)
+    if error is not None:
+        raise error
+    return result
+
+def _pool(tasks, workers):
+    #Threads only wait on the worker processes, one process per file
+    if len(tasks) < 2 or workers == 1:
+        return None
+    return ThreadPoolExecutor(min(len(tasks), workers or os.cpu_count() or 1))
+
+def load_files(tasks, workers=None, timer=None):
+    #One task per (kind, bytes) file, results come back in task order
+    if timer is None or not timer.enabled:
+        load = load_file
+    else:
+        load = partial(_load_profiled, memory=timer.memory)
+    pool = _pool(tasks, workers)
+    if pool is None:
+        results = [load(task) for task in tasks]
+    else:
+        with pool:
+            results = list(pool.map(partial(_in_worker, load), tasks))
+    if load is load_file:
+        return results
+    for frame, records in results:
+        for record in records:
+            timer.add(record, logged=True) #the worker already logged it
+    return [frame for frame, records in results]
+
+def load_uploads(uploads, workers=None, cache=None):
+    #uploads maps each uploader kind to a list of file bytes, returns cleaned frames per platform
+    return load_uploads_keyed(uploads, workers, cache)[0]
+
+def load_uploads_keyed(uploads, workers=None, cache=None, timer=None):
+    #Also returns each platform's content key, which names the import in a HistoryStore.
+    #A timer gets a record per parse, clean and merge stage that actually ran
+    timer = timer or StageTimer()
+    tasks = [(kind, payload) for kind, payloads in uploads.items() for payload in payloads]
+    keys = [content_key(kind, payload) for kind, payload in tasks]
+    platform_keys = {}
+    for (kind, _), key in zip(tasks, keys):
+        platform_keys.setdefault(_platform(kind), []).append(key)
+    platform_keys = {platform: combined_key(platform, files) for platform, files in platform_keys.items()}
+
+    #Whole platforms already cleaned for exactly these files skip parsing altogether
+    frames = {}
+    if cache is not None:
+        for platform, key in platform_keys.items():
+            frame = cache.get(key)
+            if frame is not None:
+                frames[platform] = frame
+    needed = [i for i, (kind, _) in enumerate(tasks) if _platform(kind) not in frames]
+
+    loaded = {}
+    missing = []
+    for i in needed:
+        frame = cache.get(keys[i]) if cache is not None else None
+        if frame is None:
+            missing.append(i)
+        else:
+            loaded[i] = frame
+    for i, frame in zip(missing, load_files([tasks[i] for i in missing], workers, timer)):
+        loaded[i] = frame
+        if cache is not None and frame is not None:
+            cache.put(keys[i], frame)
+
+    chunks = {}
+    for i in needed:
+        if loaded[i] is not None:
+            chunks.setdefault(tasks[i][0], []).append(loaded[i])
+    def merged(kind):
+        return timer.run(f'concat {kind}', concat_plays, chunks[kind])
+
+    built = {}
+    if 'spotify' in chunks and 'spotifyFull' in chunks:
+        built['spotify'] = timer.run('merge_spotify', merge_spotify, merged('spotify'), merged('spotifyFull'))
+    elif 'spotify' in chunks or 'spotifyFull' in chunks:
+        built['spotify'] = merged('spotify' if 'spotify' in chunks else 'spotifyFull')
+    if 'youtube' in chunks:
+        built['youtube'] = timer.run('find_youtube_artists', find_youtube_artists, merged('youtube'))
+    if 'apple_history' in chunks and 'apple_songs' in chunks:
+        built['apple'] = timer.run('merge_apple', merge_apple, merged('apple_history'), merged('apple_songs'))
+    for platform, frame in built.items():
+        frames[platform] = frame
+        if cache is not None:
+            cache.put(platform_keys[platform], frame)
+    frames = {platform: frames[platform] for platform in PLATFORM_KINDS if platform in frames}
+    return frames, {platform: platform_keys[platform] for platform in frames}
@@ -0,0 +1,85 @@
+import re
+from collections import deque
+
+#Phrases cut from YouTube titles after the artist names
+TITLE_CUTS = ['(Un-Official Video)', '(Official Video)', '(lyrics)', '-', '(Official)', '(Audio)', '(Official Music Video)', '(feat. )']
+
+
+class ArtistMatcher:
+    #Aho-Corasick automaton over lowercased artist names, built once per upload
+    def __init__(self, artists):
+        self.names = {} #lowercased artist -> artist as written
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [None] #longest artist ending at each node (itself or through fail links)
+        for artist in artists:
+            key = artist.lower()
+            if not key or key in self.names:
+                continue
+            self.names[key] = artist
+            node = 0
+            for char in key:
+                child = self.goto[node].get(char)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto[node][char] = child
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(None)
+                node = child
+            self.out[node] = key
+
+        #Breadth first so shorter suffixes have their links before longer ones
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                if self.out[child] is None:
+                    self.out[child] = self.out[self.fail[child]]
+
+    def longest(self, text):
+        #Longest artist appearing anywhere in text (earliest one on ties), or None
+        goto, fail, out = self.goto, self.fail, self.out
+        node, best = 0, None
+        for char in text.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            found = out[node]
+            if found is not None and (best is None or len(found) > len(best)):
+                best = found
+        return self.names[best] if best is not None else None
+
+    def find(self, titles):
+        #Match each distinct title once, then map back onto the column
+        found = {title: self.longest(title) for title in titles.dropna().unique()}
+        return titles.map(found)
+
+
+def build_title_pattern(artists, phrases=TITLE_CUTS):
+    #One case-insensitive regex matching any artist or cut phrase, built once per upload
+    trie = {}
+    for word in list(artists) + list(phrases):
+        word = word.lower()
+        if not word:
+            continue
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {} #end of a word
+    return re.compile(_trie_regex(trie), re.IGNORECASE)
+
+def _trie_regex(node):
+    #Shared prefixes are factored out so the regex never retries thousands of branches
+    branches = [re.escape(char) + _trie_regex(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        body = '(?:' + body + ')?' #greedy, so the longest word wins
+    return body
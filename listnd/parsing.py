@@ -0,0 +1,100 @@
+import codecs, json
+from array import array
+import numpy as np
+import pandas as pd
+
+#Fields of Streaming_History_Audio_*.json the dashboard actually uses
+SPOTIFY_FULL_TEXT = ['ts', 'master_metadata_track_name', 'master_metadata_album_artist_name']
+SPOTIFY_FULL_INTS = ['ms_played']
+#Fields of StreamingHistory*.json and watch-history.json
+SPOTIFY_TEXT = ['endTime', 'artistName', 'trackName']
+SPOTIFY_INTS = ['msPlayed']
+YOUTUBE_FIELDS = ['header', 'title', 'subtitles', 'time']
+#Columns of Apple Music Play Activity.csv clean_apple_history uses, out of 100+
+APPLE_HISTORY_COLUMNS = ['Event Start Timestamp', 'Song Name', 'Media Duration In Milliseconds']
+APPLE_HISTORY_DTYPES = {'Song Name': 'category', 'Media Duration In Milliseconds': 'float64'}
+
+def iter_json_array(stream, chunk_size=1 << 20):
+    #Yield the items of a top-level JSON array while reading the bytes chunk by chunk
+    if hasattr(stream, 'seek'):
+        stream.seek(0)
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer, pos, done, started = '', 0, False, False
+
+    def refill():
+        nonlocal buffer, pos, done
+        chunk = stream.read(chunk_size)
+        done = not chunk
+        buffer = buffer[pos:] + text.decode(chunk or b'', final=done)
+        pos = 0
+
+    while True:
+        #skip whitespace and separators, pulling more bytes when the buffer runs dry
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos == len(buffer):
+            if done:
+                raise ValueError("JSON array ended early")
+            refill()
+            continue
+        if not started:
+            if buffer[pos] != '[':
+                raise ValueError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if done:
+                raise
+            refill() #item is split across chunks
+            continue
+        after = end
+        while after < len(buffer) and buffer[after] in ' \t\r\n':
+            after += 1
+        if after == len(buffer) or buffer[after] not in ',]':
+            if not done: #a number can go on in the next chunk, '12' or '0.5e3' split early would decode short
+                refill()
+                continue
+            if after < len(buffer):
+                raise ValueError("Expected , or ] after an array item")
+        pos = end
+        yield item
+
+def parse_fields(contents, fields, ints=(), shared=(), chunk_size=1 << 20):
+    #Stream a JSON array straight into column buffers, skipping every field not asked for
+    texts = {field: [] for field in fields}
+    numbers = {field: array('q') for field in ints}
+    shared = set(shared)
+    seen = {} #repeated artists/titles in the shared fields keep one string
+    for item in iter_json_array(contents, chunk_size):
+        for field, column in texts.items():
+            value = item.get(field)
+            column.append(seen.setdefault(value, value) if field in shared and isinstance(value, str) else value)
+        for field, column in numbers.items():
+            column.append(item.get(field) or 0)
+    frame = pd.DataFrame(texts)
+    for field, column in numbers.items():
+        frame[field] = np.frombuffer(column, dtype=np.int64)
+    return frame
+
+def parse_spotifyFull(contents, chunk_size=1 << 20):
+    return parse_fields(contents, SPOTIFY_FULL_TEXT, SPOTIFY_FULL_INTS, SPOTIFY_FULL_TEXT[1:], chunk_size)
+
+def parse_spotify(contents, chunk_size=1 << 20):
+    return parse_fields(contents, SPOTIFY_TEXT, SPOTIFY_INTS, SPOTIFY_TEXT[1:], chunk_size)
+
+def parse_youtube(contents, chunk_size=1 << 20):
+    return parse_fields(contents, YOUTUBE_FIELDS, shared=['header', 'title'], chunk_size=chunk_size)
+
+def parse_apple_history(contents):
+    #Only the used columns, typed up front. The pyarrow reader parses the ISO8601 timestamps itself,
+    #parse_dates on the C reader is slower than reading them as text and converting in clean_apple_history
+    history = pd.read_csv(contents, engine='pyarrow', usecols=APPLE_HISTORY_COLUMNS, dtype=APPLE_HISTORY_DTYPES)
+    if isinstance(history['Event Start Timestamp'].dtype, pd.DatetimeTZDtype):
+        history['Event Start Timestamp'] = history['Event Start Timestamp'].dt.as_unit('us') #same unit as pd.to_datetime gives
+    return history
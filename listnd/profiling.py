@@ -0,0 +1,56 @@
+import json, logging, time, tracemalloc
+import pandas as pd
+
+log = logging.getLogger('listnd.stages')
+
+def _rows(values):
+    #Rows across the frames and series among values (or inside their lists and dicts), None when there are none
+    frames = []
+    for value in values:
+        if isinstance(value, dict):
+            value = list(value.values())
+        frames += [frame for frame in (value if isinstance(value, (list, tuple)) else [value]) if isinstance(frame, (pd.DataFrame, pd.Series))]
+    return sum(len(frame) for frame in frames) if frames else None
+
+class StageTimer:
+    #Opt-in wall time and rows in/out per stage, kept as records and logged as one JSON line each.
+    #Disabled it only checks a flag before calling through. Peak memory is a separate opt-in (memory=True):
+    #tracemalloc slows Python-heavy stages several times over, so its records' seconds aren't real timings
+    def __init__(self, enabled=False, memory=False):
+        self.enabled = enabled
+        self.memory = enabled and memory
+        self.records = []
+        if enabled and not log.handlers:
+            log.addHandler(logging.StreamHandler())
+            log.setLevel(logging.INFO)
+            log.propagate = False
+
+    def run(self, stage, func, *args, **kwargs):
+        if not self.enabled:
+            return func(*args, **kwargs)
+        if not self.memory:
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            self.add(self._record(stage, time.perf_counter() - start, args, kwargs, result, None))
+            return result
+        nested = tracemalloc.is_tracing() #an outer stage is measuring, leave its peak alone
+        if not nested:
+            tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        if not nested:
+            tracemalloc.stop()
+        self.add(self._record(stage, seconds, args, kwargs, result, round(max(peak - before, 0) / 2**20, 2)))
+        return result
+
+    def _record(self, stage, seconds, args, kwargs, result, peak_mb):
+        return {'stage': stage, 'seconds': round(seconds, 4), 'rows_in': _rows(list(args) + list(kwargs.values())),
+            'rows_out': _rows([result]), 'peak_mb': peak_mb}
+
+    def add(self, record, logged=False):
+        self.records.append(record)
+        if not logged:
+            log.info(json.dumps(record))
@@ -0,0 +1,197 @@
+import pandas as pd
+import plotly.express as px
+from listnd.canonical import TrackNames
+from listnd.charts import hours_figure, platform_figure
+from listnd.cleaners import concat_plays, unify
+from listnd.cube import PartitionedCube
+from listnd.dedup import mark_copies
+from listnd.sessions import listening_stats
+from listnd.topk import PERIOD_ORDER, top_k, top_per_period
+
+#Texts and figures of every dashboard section, streamlit.py shows them and the batch CLI writes them to files.
+#They take PartitionedCube totals (plays per key) for the selection, never the plays themselves
+
+def where(total, level, values):
+    #Rows of a total whose level is one of values
+    return total[total.index.get_level_values(level).isin(values)]
+
+def facts_texts(days, artist_days, title_days, artist_minutes, platforms):
+    #Biggest listening day and artist for that day 
+    daily_counts = days.groupby(level='date').sum().reset_index(name='listen_count').sort_values('listen_count', ascending=False)
+    top_day = daily_counts.iloc[0]['date']
+    topday_count = daily_counts.iloc[0]['listen_count']
+    topday_df = where(artist_days, 'date', [top_day]).groupby(level='artist', observed=True).sum()
+    topday_df = topday_df.reset_index(name='listen_count').sort_values('listen_count', ascending=False)
+    topday_artist = topday_df.iloc[0]['artist']
+    top_day = pd.to_datetime(top_day).strftime('%m-%d-%Y')
+    topday_text = f"You listened to {topday_count} songs on {top_day}! Big day for you. Big day for being a fan of {topday_artist} too it seems."
+
+    #Most repeated song on one day
+    repeat_counts = title_days.reset_index(name='listen_count').sort_values('listen_count', ascending=False)
+    repeated_song = repeat_counts.iloc[0]['title']
+    repeated_day = pd.to_datetime(repeat_counts.iloc[0]['date']).strftime('%m-%d-%Y')
+    repeated_counts = repeat_counts.iloc[0]['listen_count']
+    repeat_text = f"You listened to {repeated_song} {repeated_counts} times on {repeated_day}. A new record for you. It's that good?"
+
+    #Number of unique songs listened to
+    num_songs=repeat_counts.size
+    if num_songs > 15921:
+        num_text = f"Wow! You listened to {num_songs} songs. Better than me..."
+    elif num_songs < 15921:
+        num_text = f"Huh, you only listened to {num_songs} songs... I could do better."
+    else:
+        num_text = f"You listened to {num_songs} songs. Samesies!"
+
+    #Compare listening by minutes
+    if all(p == "youtube" for p in platforms): #cant do this with just youtube
+        minutes_text = ":)" 
+    else:
+        disc=""
+        if ("youtube" in platforms): #disclaimer if user uses youtube
+            disc = "(Youtube Music does not give time listened, so this is your music minus Youtube!) \n"
+        mostminutes = artist_minutes['msPlayed'].reset_index().sort_values('msPlayed', ascending=False) #only plays with a time
+        mostminutes['hours'] = mostminutes['msPlayed'] / 3600000 #get hours
+        topmins = mostminutes.head(5)['artist'].tolist() #get top 5 most minutes
+        topsongs = artist_minutes['timed'].reset_index(name='listen_count').sort_values('listen_count', ascending=False).head(5)
+        topsongs = topsongs['artist'].tolist()
+        if (sorted(topsongs) == sorted(topmins)):
+            text1 = "the same artists"
+            if (topsongs==topmins):
+                text2 = "and in the same order!"
+            else:
+                text2 = " but not in the same order."
+        else:
+            text1= "different artists"
+            text2= ", interesting"
+
+        minutes_text =(f"{disc} Dang! {round(mostminutes.iloc[0]['hours'], 1)} hours of {mostminutes.iloc[0]['artist']}. Moving on... \n" 
+                f"If we look at listening based on minutes, your top artists are {', '.join(topmins)}.\n" 
+                f"Which is interesting when compared to top artists by song. You've got {text1} {text2}")
+
+    return [num_text, topday_text, repeat_text, minutes_text]
+
+def topsongs_figures(songs, title_months):
+    #Barchart of top artists
+    top10 = top_k(songs, 10).reset_index(name='count')
+
+    fig = px.bar(top10, x="title", y="count", color="artist", 
+                 color_discrete_sequence=px.colors.qualitative.Pastel, 
+             orientation="v", title="Top 10 Songs")
+    fig.update_layout(
+        xaxis=dict(categoryorder='array', categoryarray=top10['title'].tolist()), height=600)
+
+    #Linegraph of top artists
+    top5_song = top10['title'].head(5).unique() #list of top 5 songs
+    monthly_song = where(title_months, 'title', top5_song).reset_index(name='listen_count')
+
+    line = px.line(monthly_song, x="yearMonth", y="listen_count", color="title", title="Top 5 Songs Through the Time Period")
+    line.update_layout(xaxis_title='Month of Year', yaxis_title='Listen Count')
+    return fig, line
+
+def topartists_figures(artists, artist_months, n=3, period='month', artist_days=None):
+    #artist_days (plays per artist and date) is needed for periods shorter than a month
+    #For pie chart
+    artist10 = top_k(artists, 10).reset_index(name='count') #frequency of top artists 
+
+    pie = px.pie(artist10, values='count', names='artist', title="Top 10 Artists")
+
+    #Barchart of top n per period
+    top5_artists_overall = artist10['artist'].head(5).tolist()
+    color_palette = px.colors.qualitative.Plotly
+    custom_color_map = {artist: color_palette[i] for i, artist in enumerate(top5_artists_overall)}
+    if artist_days is not None and PERIOD_ORDER.index(period) < PERIOD_ORDER.index('month'):
+        period_artists = top_per_period(artist_days, n, period, on='date').rename(columns={'date': 'yearMonth'})
+    else:
+        period_artists = top_per_period(artist_months, n, period)
+    period_artists = period_artists.rename(columns={'count': 'listen_count'})
+    def generate_grayscale(n, start=200, end=80):
+        step = (start - end) // max(n - 1, 1)
+        return [f"#{v:02x}{v:02x}{v:02x}" for v in range(start, end - 1, -step)]
+    grayscale_colors = generate_grayscale(10) 
+    all_artists = period_artists['artist'].unique()
+    non_top5_artists = [a for a in all_artists if a not in top5_artists_overall]
+    for i, artist in enumerate(non_top5_artists):
+        custom_color_map[artist] = grayscale_colors[i % len(grayscale_colors)]
+
+    fig = px.bar(period_artists, x="yearMonth", y="listen_count", color="artist", labels={"artist":"Top 5 Artists"},
+             color_discrete_map=custom_color_map, barmode="stack", title=f"Top {n} artists per {period}")
+    for trace in fig.data: #Legend only has top5
+        if trace.name not in top5_artists_overall:
+            trace.showlegend = False
+    return pie, fig
+
+def monthly_figure(month_artists, month_titles, months, subject):
+    if subject == "Artists":
+        top5 = top_k(where(month_artists, 'month', months).groupby(level='artist', observed=True).sum(), 5).reset_index(name='count')
+        pie = px.pie(top5, values='count', names='artist', title="Top 5 Artists for Select Months")
+        return pie
+    elif subject == "Songs":
+        top5 = top_k(where(month_titles, 'month', months).groupby(level='title', observed=True).sum(), 5).reset_index(name='count')
+        pie = px.pie(top5, values='count', names='title', title="Top 5 Songs for Select Months")
+        return pie
+
+def artist_text(songs, artist_days, chosen_artist):
+    bigdog_music = where(songs, 'artist', [chosen_artist]).droplevel('artist')
+    bigdog_music = bigdog_music.reset_index(name='count').sort_values('count', ascending=False).head(3)
+    favsongs = bigdog_music['title'].tolist()
+
+    if len(favsongs) > 2:
+        favsongs = f"{', '.join(favsongs[:-1])}, and {favsongs[-1]}"
+    else:
+        favsongs = ' and '.join(favsongs) #an artist with only one or two songs
+
+    first_listen = where(artist_days, 'artist', [chosen_artist]).index.get_level_values('date').min().strftime('%m-%d-%Y')
+    say= f"Love at first sight... On {first_listen}, precisely, for you and {chosen_artist} that is. \nSince then you've been a big fan of {favsongs}."
+    return say
+
+def sessions_section(stats):
+    #Longest session, longest artist streak, biggest binge and the top artists' first and last plays, from listening_stats
+    sessions = stats['sessions']
+    longest = sessions.loc[(sessions['end'] - sessions['start']).idxmax()]
+    hours = (longest['end'] - longest['start']) / pd.Timedelta(hours=1)
+    items = [f"You had {len(sessions)} listening sessions. The longest started on {longest['start']:%m-%d-%Y} and went on for {hours:.1f} hours and {longest['plays']} songs. Snacks?"]
+
+    streaks = stats['streaks']
+    if not streaks.empty:
+        streak = streaks.iloc[0]
+        items.append(f"You listened to {streak['artist']} {streak['days']} days in a row, from {streak['start']:%m-%d-%Y} to {streak['end']:%m-%d-%Y}. That's commitment.")
+
+    binges = stats['binges']
+    if binges.empty:
+        items.append("You never played the same song twice in a row. Variety!")
+    else:
+        binge = binges.iloc[0]
+        items.append(f"You played {binge['title']} by {binge['artist']} {binge['plays']} times in a row on {binge['start']:%m-%d-%Y}. On repeat, literally.")
+
+    listens = stats['listens']
+    top10 = listens.loc[top_k(listens['plays'], 10).index].sort_values('first')
+    fig = px.timeline(top10, x_start='first', x_end='last', y='artist', title="First and Last Listen of Your Top 10 Artists")
+    fig.update_layout(xaxis_title='Date', yaxis_title='Artist', yaxis=dict(categoryorder='array', categoryarray=top10['artist'].tolist()))
+    items.append(fig)
+    return items
+
+def build_report(frames, names=None):
+    #Every section for one person's cleaned frames (platform -> frame), all years together.
+    #names is a TrackNames to reuse spellings merged before, by default a fresh one
+    music, renamed = (names or TrackNames()).canonicalize(concat_plays([unify(frame, platform) for platform, frame in frames.items()]))
+    music, dropped = mark_copies(music)
+    cubes = PartitionedCube(music)
+    return report_sections(cubes, list(frames))
+
+def report_sections(cubes, platforms):
+    years = cubes.years(platforms)
+    total = lambda name: cubes.total(name, platforms, years)
+    top_artist = top_k(total('artists'), 1).index[0]
+    if len(platforms) == 1:
+        platform_section = [f"Analysed all of your data from {', '.join(platforms)} :)"]
+    else:
+        platform_section = [platform_figure(total('days'))]
+    return {
+        'Top Songs': list(topsongs_figures(total('songs'), total('titleMonths'))),
+        'Top Artists': list(topartists_figures(total('artists'), total('artistMonths'))),
+        'Listening Facts': facts_texts(total('days'), total('artistDays'), total('titleDays'), total('artistMinutes'), platforms),
+        'Listening Sessions': sessions_section(listening_stats(cubes.plays(platforms, years))),
+        'Hourly Analysis': [hours_figure(total('hours'))],
+        'Artist Info': [artist_text(total('songs'), total('artistDays'), top_artist)],
+        'Platform Analysis': platform_section,
+    }
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+from listnd.features import NS_PER_DAY
+
+#A pause longer than this between two plays starts a new listening session
+SESSION_GAP = pd.Timedelta(minutes=30)
+
+def _ns(plays):
+    return plays['ts'].to_numpy(dtype='datetime64[ns]').view('int64')
+
+def _run_starts(breaks):
+    #Index where every run starts and its length, from a bool per row that is True where a new run starts
+    starts = np.flatnonzero(breaks)
+    return starts, np.diff(np.append(starts, len(breaks)))
+
+def sort_plays(plays):
+    #The one sort everything below relies on, by play time with ties keeping their order
+    return plays.iloc[np.argsort(_ns(plays), kind='stable')].reset_index(drop=True)
+
+def session_breaks(plays, gap=SESSION_GAP):
+    breaks = np.ones(len(plays), dtype=bool)
+    breaks[1:] = np.diff(_ns(plays)) > gap.value
+    return breaks
+
+def sessions(plays, breaks):
+    #One row per session of sorted plays: when it started and ended and how many plays it had
+    starts, lengths = _run_starts(breaks)
+    times = plays['ts'].to_numpy()
+    return pd.DataFrame({'start': times[starts], 'end': times[starts + lengths - 1], 'plays': lengths})
+
+def binges(plays, breaks):
+    #Runs of the same track played back to back within one session, longest first
+    artists, titles = plays['artist'].cat.codes.to_numpy('int64'), plays['title'].cat.codes.to_numpy('int64')
+    tracks = artists * (len(plays['title'].cat.categories) + 1) + titles
+    runs = breaks.copy()
+    runs[1:] |= tracks[1:] != tracks[:-1]
+    starts, lengths = _run_starts(runs)
+    repeated = (lengths > 1) & (artists[starts] >= 0) & (titles[starts] >= 0)
+    starts, lengths = starts[repeated], lengths[repeated]
+    binged = pd.DataFrame({'artist': plays['artist'].to_numpy()[starts], 'title': plays['title'].to_numpy()[starts],
+        'plays': lengths, 'start': plays['ts'].to_numpy()[starts]})
+    return binged.sort_values(['plays', 'start'], ascending=[False, True], kind='stable').reset_index(drop=True)
+
+def artist_streaks(plays):
+    #Longest run of consecutive days each artist was played, longest first
+    codes, days = plays['artist'].cat.codes.to_numpy('int64'), _ns(plays) // NS_PER_DAY
+    known = codes >= 0
+    if not known.any():
+        return pd.DataFrame(columns=['artist', 'days', 'start', 'end'])
+    first = days.min()
+    span = days.max() - first + 1
+    pairs = np.unique(codes[known] * span + days[known] - first) #every (artist, day) once, by artist then day
+    artists, days = pairs // span, pairs % span + first
+    breaks = np.ones(len(pairs), dtype=bool)
+    breaks[1:] = (artists[1:] != artists[:-1]) | (days[1:] != days[:-1] + 1)
+    starts, lengths = _run_starts(breaks)
+    runs = pd.DataFrame({'artist': artists[starts], 'days': lengths, 'start': days[starts]})
+    runs = runs.sort_values(['days', 'start'], ascending=[False, True], kind='stable').drop_duplicates('artist')
+    runs['end'] = (runs['start'] + runs['days'] - 1).to_numpy().astype('datetime64[D]')
+    runs['start'] = runs['start'].to_numpy().astype('datetime64[D]')
+    runs['artist'] = plays['artist'].cat.categories[runs['artist'].to_numpy()]
+    return runs.reset_index(drop=True)
+
+def artist_listens(plays):
+    #First and last play and number of plays of every artist, sorted plays make first and last a scatter of positions
+    codes = plays['artist'].cat.codes.to_numpy('int64')
+    known = codes >= 0
+    count = len(plays['artist'].cat.categories)
+    positions = np.flatnonzero(known)
+    first, last = np.full(count, len(plays)), np.full(count, -1)
+    np.minimum.at(first, codes[known], positions)
+    np.maximum.at(last, codes[known], positions)
+    played = last >= 0
+    times = plays['ts'].to_numpy()
+    return pd.DataFrame({'artist': plays['artist'].cat.categories[played], 'first': times[first[played]],
+        'last': times[last[played]], 'plays': np.bincount(codes[known], minlength=count)[played]})
+
+def listening_stats(plays, gap=SESSION_GAP):
+    #Sessions, binges, streaks and first/last listens from a single sort of the plays by time
+    plays = sort_plays(plays)
+    breaks = session_breaks(plays, gap)
+    return {'sessions': sessions(plays, breaks), 'binges': binges(plays, breaks),
+        'streaks': artist_streaks(plays), 'listens': artist_listens(plays)}
@@ -0,0 +1,53 @@
+import os, re, tempfile, time
+
+UPLOAD_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+class UploadSpool:
+    #Uploads land on disk chunk by chunk and are read back as streams, only one block is ever in memory.
+    #An upload can't grow past max_bytes. Files stay while the page may parse them again (another year,
+    #or after the parsed data was evicted) and are pruned once nobody has read them for a while
+    def __init__(self, root=None, block_size=1 << 20, max_bytes=2 << 30):
+        self.root = root or tempfile.mkdtemp(prefix='listnd-uploads-')
+        os.makedirs(self.root, exist_ok=True)
+        self.block_size = block_size
+        self.max_bytes = max_bytes
+
+    def path(self, upload_id):
+        if not UPLOAD_ID.match(upload_id): #ids come from the browser
+            raise ValueError(f"Bad upload id {upload_id!r}")
+        return os.path.join(self.root, upload_id + '.part')
+
+    def received(self, upload_id):
+        path = self.path(upload_id)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def write(self, upload_id, offset, stream):
+        #Append one chunk, a chunk that doesn't start where the file ends is refused so the client resumes from there
+        received = self.received(upload_id)
+        if offset != received:
+            return received, False
+        with open(self.path(upload_id), 'ab') as spool:
+            while block := stream.read(self.block_size):
+                if spool.tell() + len(block) > self.max_bytes:
+                    spool.truncate(received) #drop the part of this chunk already written
+                    raise ValueError(f"Upload {upload_id} is larger than {self.max_bytes >> 20} MB")
+                spool.write(block)
+        return self.received(upload_id), True
+
+    def open(self, upload_id):
+        path = self.path(upload_id)
+        os.utime(path) #read again, so prune leaves it alone
+        return open(path, 'rb')
+
+    def discard(self, upload_id):
+        path = self.path(upload_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def prune(self, max_age=24 * 3600):
+        #Uploads nobody wrote to or read for max_age seconds are never coming back
+        cutoff = time.time() - max_age
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.endswith('.part') and os.path.getmtime(path) < cutoff:
+                os.remove(path)
@@ -0,0 +1,80 @@
+import glob, json, os, uuid
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from listnd.cleaners import MERGED_COLUMNS, concat_plays
+from listnd.dedup import compare_copies
+
+#Plays are the same play if they share these
+DEDUP_KEY = ['ts', 'artist', 'title']
+#What compare_copies needs to match a new play against the library's within DEDUP_WINDOW
+MATCH_COLUMNS = DEDUP_KEY + ['msPlayed', 'platform']
+
+CATEGORY = pa.dictionary(pa.int32(), pa.string()) #read back as pandas categoricals
+SCHEMA = pa.schema([('artist', CATEGORY), ('title', CATEGORY), ('ts', pa.timestamp('us')),
+    ('date', pa.timestamp('us')), ('hour', pa.int8()), ('weekday', pa.int8()), ('month', pa.int32()),
+    ('yearMonth', pa.timestamp('us')), ('year', pa.int32()), ('msPlayed', pa.float64()), ('platform', CATEGORY)])
+
+class HistoryStore:
+    #Local library of merged-layout plays, one uncompressed Arrow file per import under platform=/year=
+    #folders, so later sessions memory-map it instead of reparsing exports
+    def __init__(self, root):
+        self.root = root
+        self._loaded = None
+
+    def _manifest_path(self):
+        return os.path.join(self.root, 'imports.json')
+
+    def imports(self):
+        #Sources (upload content keys) already written to the library
+        if not os.path.exists(self._manifest_path()):
+            return []
+        with open(self._manifest_path()) as f:
+            return json.load(f)
+
+    def _files(self, platform='*', year='*'):
+        return sorted(glob.glob(os.path.join(self.root, f'platform={platform}', f'year={year}', '*.arrow')))
+
+    def _read(self, files, columns=None):
+        tables = [feather.read_table(path, columns=columns, memory_map=True) for path in files]
+        if not tables:
+            return pd.DataFrame(columns=columns or MERGED_COLUMNS)
+        return pa.concat_tables(tables).to_pandas()
+
+    def add(self, platform, frame, source=None):
+        #Append a merged-layout frame, skipping plays the library already has; returns rows written.
+        #A play counts as had within DEDUP_WINDOW, the basic and extended Spotify exports imported
+        #separately give one play two timestamps (end minute vs start second)
+        sources = self.imports()
+        if source is not None and source in sources:
+            return 0
+        frame = frame[MERGED_COLUMNS].drop_duplicates(DEDUP_KEY)
+        written = 0
+        for year, rows in frame.groupby('year'):
+            existing = self._read(self._files(platform, year), columns=MATCH_COLUMNS)
+            if not existing.empty: #overlapping exports share plays, only keep the new ones
+                origin = np.repeat(np.array([0, 1], dtype='int8'), [len(existing), len(rows)]) #the library's copy wins
+                repeats, better = compare_copies(concat_plays([existing, rows[MATCH_COLUMNS]]), origin=origin)
+                rows = rows[((better == 0) & ~repeats)[len(existing):]]
+            if rows.empty:
+                continue
+            folder = os.path.join(self.root, f'platform={platform}', f'year={year}')
+            os.makedirs(folder, exist_ok=True)
+            table = pa.Table.from_pandas(rows, schema=SCHEMA, preserve_index=False)
+            feather.write_feather(table, os.path.join(folder, f'{uuid.uuid4().hex}.arrow'), compression='uncompressed')
+            written += len(rows)
+        if source is not None:
+            os.makedirs(self.root, exist_ok=True)
+            with open(self._manifest_path(), 'w') as f:
+                json.dump(sources + [source], f)
+        if written:
+            self._loaded = None
+        return written
+
+    def load(self):
+        #Every platform's plays, keyed by platform like load_uploads returns them
+        if self._loaded is None:
+            music = self._read(self._files())
+            self._loaded = {platform: rows.reset_index(drop=True) for platform, rows in music.groupby('platform', observed=True, sort=False)}
+        return self._loaded
@@ -0,0 +1,41 @@
+import pandas as pd
+
+def top_k(counts, k):
+    #The k largest counts by partial selection rather than sorting every key, ties keep their first position
+    return counts.nlargest(k, keep='first')
+
+class TopK:
+    #Play counts per key that grow as frames (files, import chunks) arrive, the top is selected on demand.
+    #value=None counts rows, value='plays' sums a cube
+    def __init__(self, keys, value=None):
+        self.keys, self.value = keys, value
+        self.counts = None
+
+    def update(self, frame):
+        grouped = frame.groupby(self.keys, observed=True)
+        counts = grouped.size() if self.value is None else grouped[self.value].sum()
+        if self.counts is None:
+            self.counts = counts
+        else:
+            self.counts = pd.concat([self.counts, counts]).groupby(level=self.keys, observed=True).sum()
+        return self
+
+    def top(self, k):
+        return top_k(self.counts, k)
+
+#Periods top_per_period can group by, as pandas period frequencies (weeks start on Monday), finest first
+PERIODS = {'week': 'W-SUN', 'month': 'M', 'quarter': 'Q', 'year': 'Y'}
+#The period each datetime column of the cube already bins plays into
+COLUMN_PERIODS = {'date': 'day', 'yearMonth': 'month'}
+PERIOD_ORDER = ['day'] + list(PERIODS)
+
+def top_per_period(counts, n, period='month', on='yearMonth'):
+    #Top n keys of every period in one sort and grouped head, counts is indexed by the keys and the datetime column on.
+    #Returns keys, the period start in on, and count, ordered by period then count
+    if PERIOD_ORDER.index(period) < PERIOD_ORDER.index(COLUMN_PERIODS.get(on, 'day')):
+        raise ValueError(f"Counts binned by {COLUMN_PERIODS[on]} can't be split into {period}s, pass counts by date")
+    frame = counts.rename('count').reset_index()
+    frame[on] = frame[on].dt.to_period(PERIODS[period]).dt.start_time
+    frame = frame.groupby(list(counts.index.names), observed=True)['count'].sum().reset_index()
+    frame = frame.sort_values([on, 'count'], ascending=[True, False], kind='stable')
+    return frame.groupby(on).head(n)
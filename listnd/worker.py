@@ -0,0 +1,22 @@
+import os, pickle, sys, traceback
+
+#Entry point of the processes load_files starts (python -m listnd.worker). A fresh interpreter that imports
+#only listnd: nothing of the server is copied into it, and the app script never runs in it
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def main():
+    import listnd.ingest #submodules are found through the package from now on
+    #The app folder holds streamlit.py, which would shadow the streamlit package for anything imported later
+    sys.path = [path for path in sys.path if os.path.abspath(path or os.curdir) != ROOT]
+    out, sys.stdout = sys.stdout.buffer, sys.stderr #stdout carries the result, stray prints go to the log
+    load, task = pickle.load(sys.stdin.buffer)
+    try:
+        result = (None, load(task))
+    except Exception as error: #raised again in the server like a pool would, the traceback goes to the log
+        traceback.print_exc()
+        result = (error, None)
+    pickle.dump(result, out, protocol=pickle.HIGHEST_PROTOCOL)
+    out.flush()
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,18 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import calendar, re
-from io import StringIO
+import calendar, os, uuid
+from listnd.archives import read_archive
+from listnd.cache import FrameCache, combined_key
+from listnd.canonical import TrackNames
+from listnd.charts import hours_figure, platform_figure
+from listnd.cleaners import unify, concat_plays
+from listnd.cube import PartitionedCube
+from listnd.dedup import mark_copies
+from listnd.ingest import load_uploads_keyed
+from listnd.profiling import StageTimer
+from listnd.report import facts_texts, topsongs_figures, topartists_figures, monthly_figure, artist_text, sessions_section
+from listnd.sessions import listening_stats
+from listnd.store import HistoryStore
+from listnd.topk import top_k
 
 with open("style.css") as f:
     css = f.read()
@@ -49,6 +59,9 @@ with st.expander("Instructions"):
     Wait until your data file is ready, then download this file. You may have to unzip this file.      
     To find the files we need: Apple_Media_Services.zip / Apple Music Activity / Apple Music Play Activity.csv AND Apple Music - Track Play History.csv    
     Upload these TWO files to the site in the Apple Music section.      
+
+    ### Skip the unzipping
+    You can also upload the downloaded .zip files as they are in the Export Archives section, the files above are found inside them.      
     """)
 
 st.markdown("#### Upload Spotify File")
@@ -62,405 +75,204 @@ st.markdown("#### Upload Apple Music File")
 apple_history_upload = st.file_uploader("Apple Music Play Activity", type=["csv"], accept_multiple_files=True)
 apple_songs_upload = st.file_uploader("Apple Music - Track Play History", type=["csv"], accept_multiple_files=True)
 
-def parse_json(contents):
-    stringio = StringIO(contents.getvalue().decode("utf-8"))
-    return pd.read_json(stringio)
-
-def parse_csv(contents):
-    return pd.read_csv(contents)
-
-
-def clean_spotify(spotify): 
-    #Convert spotify endTime to datetime
-    spotify['endTime'] = pd.to_datetime(spotify['endTime']) 
-    spotify['date'] = spotify['endTime'].dt.date
-    spotify['month'] = spotify['endTime'].dt.month
-    spotify['hour'] = spotify['endTime'].dt.strftime('%I %p')  
-    spotify['yearMonth'] = spotify['endTime'].dt.to_period('M').dt.to_timestamp()
-    spotify['hour'] = spotify['hour'].str.lstrip('0')
-    spotify['year'] = spotify['endTime'].dt.year
-    spotify.rename(columns={'artistName': 'artist', 'trackName': 'title'}, inplace=True) #rename columns
-    return spotify
-
-def clean_spotifyFull(spotifyF): 
-    #Convert spotifyFull ts to datetime
-    spotifyF['ts'] = pd.to_datetime(spotifyF['ts']) 
-    spotifyF['date'] = spotifyF['ts'].dt.date
-    spotifyF['month'] = spotifyF['ts'].dt.month
-    spotifyF['hour'] = spotifyF['ts'].dt.strftime('%I %p')  
-    spotifyF['yearMonth'] = spotifyF['ts'].dt.to_period('M').dt.to_timestamp()
-    spotifyF['hour'] = spotifyF['hour'].str.lstrip('0')
-    spotifyF['year'] = spotifyF['ts'].dt.year
-    spotifyF.rename(columns={'master_metadata_album_artist_name': 'artist', 'master_metadata_track_name': 'title', 'ms_played':'msPlayed'}, inplace=True)
-    return spotifyF
-
-def clean_youtube(youtube):
-    #Clean Youtube
-    youtube = youtube[youtube['header']=='YouTube Music'] #only take data from youtube music 
-    youtube = youtube.drop(['titleUrl', 'products', 'activityControls', 'description', 'details', 'header'], axis=1)
-    #Convert youtube ListTime to datetime
-    youtube['ListTime'] = pd.to_datetime(youtube['time'], errors='coerce', utc=True)
-    youtube['date'] = youtube['ListTime'].dt.date
-    youtube['month'] = youtube['ListTime'].dt.month
-    youtube['hour'] = youtube['ListTime'].dt.strftime('%I %p') 
-    youtube['hour'] = youtube['hour'].str.lstrip('0')
-    youtube['year'] = youtube['ListTime'].dt.year
-    youtube['yearMonth'] = youtube['ListTime'].dt.to_period('M').dt.to_timestamp()
-
-    #Clean Youtube Song Titles
-    def delete_watched(value): #Eliminate 'Watched' from song titles
-        pattern = r'^Watched '
-        if re.match(pattern, value):
-            cleaned = re.sub(r'^Watched ', '', value)
-            return cleaned
-    youtube['title'] = youtube['title'].apply(delete_watched) 
-
-    #Get artist names from list in subtitles
-    youtube = youtube[~youtube['subtitles'].apply(lambda x: isinstance(x, float))] #drop float rows
-    def get_name(value): #Index artist names 
-        return value[0]['name']
-    youtube['artist'] = youtube['subtitles'].apply(get_name) #Make artist column 
-
-    #Delete '- Topic' in Title 
-    def delete_topic(value): 
-        pattern = r'.*\- Topic$'
-        if re.match(pattern, value):
-            cleaned = re.sub(r' \- Topic', '', value)
-            return cleaned, True #add cleaned_flag for songs with author
-        else: return value, False
-    youtube[['artist', 'cleaned_flag']] = youtube['artist'].apply(delete_topic).apply(pd.Series)
-
-    #Eliminate random characters from titles and artists
-    youtube['title'] = youtube['title'].str.replace(r"[•·]", " ", regex=True)
-    youtube['artist'] = youtube['artist'].str.replace(r"[•·]", " ", regex=True)
-
-    artists = youtube[youtube['cleaned_flag']==True]['artist'].unique() #Create list of clean artists
-    sorted_artists = sorted(artists, key=len, reverse=True) #sort greatest to shortest to match longest
-    
-    #Find artist from artist name in title
-    def find_artist(title): #Function to find artist name in title
-        for artist in artists:
-            if artist.lower() in title.lower():
-                return artist
-        return None
-    for idx, row in youtube[~youtube['cleaned_flag']].iterrows():
-        artist_found = find_artist(row['title']) #change artist if found in title
-        if artist_found:
-            youtube.at[idx, 'artist'] = artist_found 
-
-    #Clean random words from song title
-    def clean_title(title):
-        for artist in artists: #eliminate artist from title
-            pattern = re.compile(re.escape(artist), re.IGNORECASE)
-            title = pattern.sub('', title)
-        cuts = ['(Un-Official Video)', '(Official Video)', '(lyrics)', '-', '(Official)', '(Audio)', '(Official Music Video)', '(feat. )']
-        for phrase in cuts: #eliminate phrases from title
-            pattern = re.compile(re.escape(phrase), re.IGNORECASE)
-            title = pattern.sub('', title)
-        title = title.strip()
-        return title
-    youtube['title'] = youtube['title'].apply(clean_title)
-
-    return youtube
-
-def clean_apple(history, songs):
-    #Convert apple startTime to datetime
-    history['startTime'] = pd.to_datetime(history['Event Start Timestamp'], format='ISO8601') 
-    history['date'] = pd.to_datetime(history['startTime'].dt.date)
-    history['month'] = history['startTime'].dt.month
-    history['hour'] = history['startTime'].dt.strftime('%I %p') 
-    history['yearMonth'] = history['startTime'].dt.to_period('M').dt.to_timestamp()
-    history['hour'] = history['hour'].str.lstrip('0')
-    history['year'] = history['startTime'].dt.year
-
-    #Separate song titles and artists 
-    songs[['artist', 'title']] = songs['Track Name'].str.extract(r'^\s*(.*?)\s*-\s*(.*)$')
-    songs = songs[['artist', 'title']].copy()
-
-    #Take and rename needed apple columns
-    history = history[['Song Name', 'date', 'month', 'hour','yearMonth', 'year','Media Duration In Milliseconds']].copy()
-    history.rename(columns={'Song Name': 'title', 'Media Duration In Milliseconds': 'msPlayed'}, inplace=True)
-
-    apple = pd.merge(history, songs, on='title', how='left')
-    apple['artist'] = apple['artist'].fillna('Unknown')
-    return apple
+st.markdown("#### Or Upload Export Archives")
+archive_upload = st.file_uploader("my_spotify_data.zip, Takeout .zip, Apple_Media_Services.zip", type=["zip"], accept_multiple_files=True)
+
+st.markdown("#### Library")
+use_library = st.checkbox("Keep my uploads in a local library and load it next time", value=False,
+    help="Your library is tied to this page's link, open the same link next time to load it")
+
+#Stage timings for finding slow loads, opt in with ?profile=1 in the url or LISTND_PROFILE=1.
+#profile=memory adds peak memory per stage, tracing it makes the timings much slower than a real run
+profile = st.query_params.get('profile') or os.environ.get('LISTND_PROFILE')
+timer = StageTimer(profile in ('1', 'memory'), memory=profile == 'memory')
+
+def library_id():
+    #Every browser gets its own library, named by a random id kept in the page's url so a reload or bookmark
+    #finds it again. Nobody can load a library without its id
+    try:
+        return uuid.UUID(hex=st.query_params.get('library', '')).hex
+    except ValueError:
+        st.query_params['library'] = uuid.uuid4().hex
+        return st.query_params['library']
+
+@st.cache_resource(max_entries=16)
+def history_store(user): #plays saved from this user's earlier sessions, deduplicated across imports
+    root = os.environ.get('LISTND_LIBRARY', os.path.join(os.path.expanduser('~'), '.listnd', 'library'))
+    return HistoryStore(os.path.join(root, user))
+
+@st.cache_resource
+def frame_cache(): #kept across reruns so widget changes don't reparse the uploads
+    return FrameCache(max_bytes=int(os.environ.get('LISTND_CACHE_MB', 1024)) * 2**20,
+        spill_dir=os.environ.get('LISTND_CACHE_DIR'), max_spill_bytes=int(os.environ.get('LISTND_CACHE_DISK_MB', 4096)) * 2**20)
+
+@st.cache_resource(max_entries=16)
+def library_names(user): #spellings merged in earlier sessions, kept in the user's library
+    return TrackNames(os.path.join(history_store(user).root, 'track_names.arrow'))
+
+def track_names(user):
+    #The library's mapping when it is used, otherwise one kept in memory for this browser session only.
+    #Returns an id for the mapping with it, cubes built with another mapping can't be reused
+    if user:
+        return user, library_names(user)
+    if 'track_names' not in st.session_state:
+        st.session_state['track_names'] = (uuid.uuid4().hex, TrackNames())
+    return st.session_state['track_names']
+
+@st.cache_resource(max_entries=4)
+def partitioned_cube(key, names_id, _frames, _names, _timer): #rebuilt only when the plays behind key or the spellings used change, not on every widget change
+    music = _timer.run('dataframe_merge', dataframe_merge, _frames.get('spotify'), _frames.get('youtube'), _frames.get('apple'), list(_frames))
+    music, renamed = _timer.run('canonicalize', _names.canonicalize, music) #one spelling per song across platforms
+    music, dropped = _timer.run('mark_copies', mark_copies, music) #overlapping files, copies on other platforms are left out per selection
+    return _timer.run('PartitionedCube', PartitionedCube, music), dropped, renamed
 
 def dataframe_merge(spotifydf, youtubedf, appledf, selected_platform):
     df = []
 
     if 'spotify' in selected_platform:
-        spotify2 = spotifydf[['artist', 'title', 'date', 'hour', 'month', 'yearMonth','year','msPlayed']] #Take only select columns
-        spotify2['platform'] = 'spotify'
-        df.append(spotify2)
+        df.append(unify(spotifydf, 'spotify')) #Take only select columns
 
     if 'youtube' in selected_platform:
-        youtube2 = youtubedf[['artist', 'title', 'date', 'hour', 'month','year', 'yearMonth']]
-        youtube2['msPlayed'] = None
-        youtube2['platform'] = 'youtube'
-        df.append(youtube2)
+        df.append(unify(youtubedf, 'youtube'))
 
     if 'apple' in selected_platform:
-        apple2 = appledf[['artist', 'title', 'date', 'hour', 'month', 'yearMonth','year', 'msPlayed']]
-        apple2['platform'] = 'apple'
-        df.append(apple2)
+        df.append(unify(appledf, 'apple'))
 
     if df:
-        music = pd.concat(df, ignore_index=True)
+        music = concat_plays(df)
         return music
 
-def make_facts(dataframe, platforms):
-    #Biggest listening day and artist for that day 
-    dataframe['date'] = pd.to_datetime(dataframe['date'])
-    daily_counts = dataframe.groupby(['date']).size().reset_index(name='listen_count').sort_values('listen_count', ascending=False)
-    top_day = daily_counts.iloc[0]['date']
-    topday_count = daily_counts.iloc[0]['listen_count']
-    topday_df = dataframe[dataframe['date']==top_day]
-    topday_df = topday_df.groupby(['artist']).size().reset_index(name='listen_count').sort_values('listen_count', ascending=False)
-    topday_artist = topday_df.iloc[0]['artist']
-    top_day = pd.to_datetime(top_day).strftime('%m-%d-%Y')
-    topday_text = f"You listened to {topday_count} songs on {top_day}! Big day for you. Big day for being a fan of {topday_artist} too it seems."
-
-    #Most repeated song on one day
-    repeat_counts = dataframe.groupby(['date','title']).size().reset_index(name='listen_count').sort_values('listen_count', ascending=False)
-    repeated_song = repeat_counts.iloc[0]['title']
-    repeated_day = pd.to_datetime(repeat_counts.iloc[0]['date']).strftime('%m-%d-%Y')
-    repeated_counts = repeat_counts.iloc[0]['listen_count']
-    repeat_text = f"You listened to {repeated_song} {repeated_counts} times on {repeated_day}. A new record for you. It's that good?"
-
-    #Number of unique songs listened to
-    num_songs=repeat_counts.size
-    if num_songs > 15921:
-        num_text = f"Wow! You listened to {num_songs} songs. Better than me..."
-    elif num_songs < 15921:
-        num_text = f"Huh, you only listened to {num_songs} songs... I could do better."
-    else:
-        num_text = f"You listened to {num_songs} songs. Samesies!"
+def make_facts(days, artist_days, title_days, artist_minutes, platforms):
+    for text in facts_texts(days, artist_days, title_days, artist_minutes, platforms):
+        st.text(text)
 
-    #Compare listening by minutes
-    if all(p == "youtube" for p in platforms): #cant do this with just youtube
-        minutes_text = ":)" 
-    else:
-        disc=""
-        if ("youtube" in platforms): #disclaimer if user uses youtube
-            disc = "(Youtube Music does not give time listened, so this is your music minus Youtube!) \n"
-        music2 = dataframe.dropna() #drop values with no time
-        mostminutes = music2.groupby('artist')['msPlayed'].sum().reset_index().sort_values('msPlayed', ascending=False)
-        mostminutes['hours'] = mostminutes['msPlayed'] / 3600000 #get hours
-        topmins = mostminutes.head(5)['artist'].tolist() #get top 5 most minutes
-        topsongs = music2.groupby(['artist']).size().reset_index(name='listen_count').sort_values('listen_count', ascending=False).head(5)
-        topsongs = topsongs['artist'].tolist()
-        if (sorted(topsongs) == sorted(topmins)):
-            text1 = "the same artists"
-            if (topsongs==topmins):
-                text2 = "and in the same order!"
-            else:
-                text2 = " but not in the same order."
-        else:
-            text1= "different artists"
-            text2= ", interesting"
-
-        minutes_text =(f"{disc} Dang! {round(mostminutes.iloc[0]['hours'], 1)} hours of {mostminutes.iloc[0]['artist']}. Moving on... \n" 
-                f"If we look at listening based on minutes, your top artists are {', '.join(topmins)}.\n" 
-                f"Which is interesting when compared to top artists by song. You've got {text1} {text2}")
-
-    st.text(num_text)
-    st.text(topday_text)
-    st.text(repeat_text)
-    st.text(minutes_text)
-
-def make_topsongs(dataframe):
-    #Barchart of top artists
-    song_counts = dataframe.groupby(['title', 'artist']).size().reset_index(name='count')
-    top10 = song_counts.sort_values('count', ascending=False).head(10)
-
-    fig = px.bar(top10, x="title", y="count", color="artist", 
-                 color_discrete_sequence=px.colors.qualitative.Pastel, 
-             orientation="v", title="Top 10 Songs")
-    fig.update_layout(
-        xaxis=dict(categoryorder='array', categoryarray=top10['title'].tolist()), height=600)
+def make_topsongs(songs, title_months):
+    fig, line = topsongs_figures(songs, title_months)
     st.plotly_chart(fig, use_container_width=True)
-
-    #Linegraph of top artists
-    song_counts = dataframe.groupby(['title', 'artist']).size().reset_index(name='count')
-    top10 = song_counts.sort_values('count', ascending=False).head(10)
-    top5_song = top10['title'].head(5).unique() #list of top 5 songs
-    top5_songs = dataframe[dataframe['title'].isin(top5_song)]
-    monthly_song = top5_songs.groupby(['title', 'yearMonth']).size().reset_index(name='listen_count')
-
-    line = px.line(monthly_song, x="yearMonth", y="listen_count", color="title", title="Top 5 Songs Through the Time Period")
-    line.update_layout(xaxis_title='Month of Year', yaxis_title='Listen Count')
     st.plotly_chart(line)
 
-def make_topartists(dataframe):
-    #For pie chart
-    artist_freq = dataframe['artist'].value_counts().reset_index()
-    artist_freq.columns = ['artist', 'count'] #frequency of top artists 
-    artist_freq = artist_freq.reset_index()
-    top_artist = artist_freq.sort_values('count', ascending=False)
-    artist10 = top_artist.head(10)
-
-    pie = px.pie(artist10, values='count', names='artist', title="Top 10 Artists")
+def make_topartists(artists, artist_months, n=3, period='month', artist_days=None):
+    pie, fig = topartists_figures(artists, artist_months, n, period, artist_days)
     st.plotly_chart(pie)
-    
-
-    #Barchart of top 3
-    monthly_counts = dataframe.groupby(['artist', 'yearMonth']).size().reset_index(name='listen_count')
-    top5_artists_overall = (monthly_counts.groupby('artist')['listen_count'].sum().sort_values(ascending=False)
-        .head(5).index.tolist())
-    color_palette = px.colors.qualitative.Plotly
-    custom_color_map = {artist: color_palette[i] for i, artist in enumerate(top5_artists_overall)}
-    top3_artists = pd.DataFrame()
-    for month in monthly_counts['yearMonth'].sort_values().unique():
-        df = monthly_counts[monthly_counts['yearMonth']==month]
-        df = df.sort_values('listen_count', ascending=False).head(3)
-        top3_artists = pd.concat([top3_artists, df])
-    top3_artists = top3_artists.sort_values(by=["yearMonth", "listen_count"], ascending=[True, False])
-    def generate_grayscale(n, start=200, end=80):
-        step = (start - end) // max(n - 1, 1)
-        return [f"#{v:02x}{v:02x}{v:02x}" for v in range(start, end - 1, -step)]
-    grayscale_colors = generate_grayscale(10) 
-    all_artists = top3_artists['artist'].unique()
-    non_top5_artists = [a for a in all_artists if a not in top5_artists_overall]
-    for i, artist in enumerate(non_top5_artists):
-        custom_color_map[artist] = grayscale_colors[i % len(grayscale_colors)]
-
-    fig = px.bar(top3_artists, x="yearMonth", y="listen_count", color="artist", labels={"artist":"Top 5 Artists"},
-             color_discrete_map=custom_color_map, barmode="stack", title="Top 3 artists per month")
-    for trace in fig.data: #Legend only has top5
-        if trace.name not in top5_artists_overall:
-            trace.showlegend = False
     st.plotly_chart(fig)
 
-def make_platform(dataframe, platforms):
+@st.cache_resource(max_entries=16)
+def selection_stats(key, platforms, years, _cubes): #the plays are sorted once per cube and selection, not on every rerun
+    return listening_stats(_cubes.plays(list(platforms), list(years)))
+
+def make_sessions(stats):
+    for item in sessions_section(stats):
+        if isinstance(item, str):
+            st.text(item)
+        else:
+            st.plotly_chart(item)
+
+def make_platform(days, platforms):
     if len(platforms) == 1:
         st.success(f"Analysed all of your data from {', '.join(platforms)} :)")
     else: 
-        fig = px.histogram(dataframe, x='date', color='platform', nbins=24, barmode='stack',
-        title='Platforms Used Throughout The Year')
-        fig.update_layout(xaxis_title='date', yaxis_title='songs')
-        st.plotly_chart(fig)
-
-def monthly_analysis(dataframe, months, subject):
-    mdf = dataframe[dataframe['month'].isin(months)]
-    if subject == "Artists":
-        monthly_artists = mdf.groupby(['artist']).size().reset_index(name='count')
-        top5 = monthly_artists.sort_values('count', ascending=False).head(5)
-        pie = px.pie(top5, values='count', names='artist', title="Top 5 Artists for Select Months")
-        st.plotly_chart(pie)
-    elif subject == "Songs":
-        monthly_songs = mdf.groupby(['title']).size().reset_index(name='count')
-        top5 = monthly_songs.sort_values('count', ascending=False).head(5)
-        pie = px.pie(top5, values='count', names='title', title="Top 5 Songs for Select Months")
+        st.plotly_chart(platform_figure(days))
+
+def monthly_analysis(month_artists, month_titles, months, subject):
+    pie = monthly_figure(month_artists, month_titles, months, subject)
+    if pie is not None:
         st.plotly_chart(pie)
     
-def artist_info(dataframe, chosen_artist):
-    bigdog = dataframe[dataframe['artist']==chosen_artist]
-    bigdog_music = bigdog.groupby(['title']).size().reset_index(name='count').sort_values('count', ascending=False).head(3)
-    favsongs = bigdog_music['title'].tolist()
-
-    first_listen = bigdog['date'].min().strftime('%m-%d-%Y')
-    say= f"Love at first sight... On {first_listen}, precisely, for you and {chosen_artist} that is. \nSince then you've been a big fan of {", ".join((favsongs)[:2])}, and {favsongs[2]}."
-    st.text(say)
-
-def make_hours(dataframe):
-    dataframe['day_name'] = dataframe['date'].dt.day_name()
-    day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    hour_order = ['12 AM', '1 AM', '2 AM', '3 AM', '4 AM', '5 AM','6 AM', '7 AM', '8 AM', '9 AM', '10 AM', '11 AM',
-        '12 PM', '1 PM', '2 PM', '3 PM', '4 PM', '5 PM','6 PM', '7 PM', '8 PM', '9 PM', '10 PM', '11 PM']
-    fig = px.density_heatmap(dataframe, x='hour', y='day_name', category_orders={'day_name':day_order, 'hour':hour_order}, title="Music Listening Through the Week")
-    fig.update_layout(yaxis_title="Day of the Week", xaxis_title="Hour")
-    st.plotly_chart(fig)
-
-if spotify_upload or spotifyFull_upload or youtube_upload or apple_history_upload:
-    spotify, spotifyFull, youtube, apple = None, None, None, None
-
-    platform_options = []
-    if spotify_upload:
-        spotifydfs = []
-        for file in spotify_upload:
-            parsed = parse_json(file)
-            if parsed is not None:
-                spotifydfs.append(parsed)
-        if spotifydfs:
-            spotify = pd.concat(spotifydfs, ignore_index=True)
-            spotify = clean_spotify(spotify)
-            platform_options.append('spotify') 
-    if spotifyFull_upload:
-        spotifyFulldfs = []
-        for file in spotifyFull_upload:
-            parsed = parse_json(file)
-            if parsed is not None:
-                spotifyFulldfs.append(parsed)
-        if spotifyFulldfs:
-            spotify = pd.concat(spotifyFulldfs, ignore_index=True)
-            spotify = clean_spotifyFull(spotify)
-            platform_options.append('spotify') 
-
-    if youtube_upload:
-        youtubedfs = []
-        for file in youtube_upload:
-            parsed = parse_json(file)
-            if parsed is not None:
-                youtubedfs.append(parsed)
-        if youtubedfs:
-            youtube = pd.concat(youtubedfs, ignore_index=True)
-            youtube = clean_youtube(youtube)
-            platform_options.append('youtube')
-
-
-    if (apple_history_upload and apple_songs_upload):
-        appledfs_h = []
-        appledfs_s = []
-        for file in apple_history_upload:
-            parsed = parse_csv(file)
-            if parsed is not None:
-                appledfs_h.append(parsed)
-        for file in apple_songs_upload:
-            parsed = parse_csv(file)
-            if parsed is not None:
-                appledfs_s.append(parsed)
-        if (appledfs_h and appledfs_s):
-            apple_history = pd.concat(appledfs_h, ignore_index=True)
-            apple_songs = pd.concat(appledfs_s, ignore_index=True)
-            apple = clean_apple(apple_history, apple_songs)
-            platform_options.append('apple')
+def artist_info(songs, artist_days, chosen_artist):
+    st.text(artist_text(songs, artist_days, chosen_artist))
+
+def make_hours(hours):
+    st.plotly_chart(hours_figure(hours))
+
+#Sections with their own widgets run as fragments, changing one of those widgets reruns only that section
+@st.fragment
+def monthly_section(month_artists, month_titles):
+    st.header("Monthly Analysis")
+    chosen_analysis = st.radio("Select what you want a deeper dive on:", options=["Artists", "Songs"], index=0)
+    month_options={i:month for i, month in enumerate(calendar.month_name) if month}
+    selected_months = st.multiselect("Select Months for Further Analysis", options=list(month_options.keys()),
+        format_func=lambda x: month_options[x], default=[1])
+    if selected_months:
+        monthly_analysis(month_artists, month_titles, selected_months, chosen_analysis)
+
+@st.fragment
+def artist_section(artists, songs, artist_days):
+    st.header("Artist Info")
+    big10arts = top_k(artists, 10).index
+    select_artist = st.selectbox("Select Artist for Further Analysis", options=list(big10arts))
+    artist_info(songs, artist_days, select_artist)
+
+library = history_store(library_id()) if use_library else None
+if spotify_upload or spotifyFull_upload or youtube_upload or apple_history_upload or archive_upload or (library and library.imports()):
+    uploads = {'spotify': spotify_upload, 'spotifyFull': spotifyFull_upload, 'youtube': youtube_upload,
+        'apple_history': apple_history_upload, 'apple_songs': apple_songs_upload}
+    uploads = {kind: [file.getvalue() for file in files] for kind, files in uploads.items()}
+    for archive in archive_upload: #only the export files inside are decompressed
+        for kind, payloads in timer.run(f'read {archive.name}', read_archive, archive).items():
+            uploads[kind] += payloads
+    if not (uploads['apple_history'] and uploads['apple_songs']):
+        uploads['apple_history'], uploads['apple_songs'] = [], []
+    #Every file is parsed and cleaned in its own worker process, unless this content was seen before
+    frames, sources = load_uploads_keyed(uploads, cache=frame_cache(), timer=timer)
+    if use_library: #save this upload once, then use everything the library has
+        for platform, frame in frames.items():
+            timer.run(f'library add {platform}', library.add, platform, unify(frame, platform), source=sources[platform])
+        frames = timer.run('library load', library.load)
+        sources = library.imports()
+    else:
+        sources = [sources[platform] for platform in frames]
+    if not frames:
+        st.warning("No listening history found in these files.")
+        st.stop()
+    names_id, names = track_names(library_id() if use_library else None)
+    cube_key = combined_key('cube', sources)
+    cubes, dropped, renamed = partitioned_cube(cube_key, names_id, frames, names, timer) #split by platform and year, built once per set of plays
+    if renamed:
+        st.caption(f"Counted {renamed} differently spelled songs under one name")
+    platform_options = list(frames)
 
     platforms = st.multiselect("Select Platforms:", options=platform_options, default=platform_options)
 
     if platforms:
-        music = dataframe_merge(spotify, youtube, apple, platforms)
-        year_options = sorted(music['year'].unique())
+        year_options = cubes.years(platforms)
         year = st.multiselect("Select Year", year_options, default=year_options)
 
-        music = music[music['year'].isin(year)] #only data from selected years
-        if music.empty:
+        skipped = dict(dropped)
+        for platform, count in cubes.shadowed(platforms, year).items():
+            skipped[platform] = skipped.get(platform, 0) + count
+        if skipped:
+            st.caption(f"Skipped {sum(skipped.values())} plays found more than once ({', '.join(f'{count} {platform}' for platform, count in skipped.items())})")
+        total = lambda name: timer.run(f'total {name}', cubes.total, name, platforms, year) #sums only the selected partitions' rollups
+        artists = total('artists')
+        if artists is None:
             st.warning("No data found after filtering.")
-        if not music.empty:
+        if artists is not None:
+            songs, artist_days, days = total('songs'), total('artistDays'), total('days')
             st.header("Top Songs")
-            make_topsongs(music)
+            timer.run('make_topsongs', make_topsongs, songs, total('titleMonths'))
             st.header("Top Artists")
-            make_topartists(music)
+            timer.run('make_topartists', make_topartists, artists, total('artistMonths'))
 
             st.header("Listening Facts")
-            make_facts(music, platforms)
+            timer.run('make_facts', make_facts, days, artist_days, total('titleDays'), total('artistMinutes'), platforms)
 
-            st.header("Hourly Analysis")
-            make_hours(music)
+            st.header("Listening Sessions")
+            stats = timer.run('listening_stats', selection_stats, (cube_key, names_id), tuple(sorted(platforms)), tuple(sorted(year)), cubes)
+            timer.run('make_sessions', make_sessions, stats)
 
-            st.header("Monthly Analysis")
-            chosen_analysis = st.radio("Select what you want a deeper dive on:", options=["Artists", "Songs"], index=0)
-            month_options={i:month for i, month in enumerate(calendar.month_name) if month}
-            selected_months = st.multiselect("Select Months for Further Analysis", options=list(month_options.keys()),
-                format_func=lambda x: month_options[x], default=[1])
-            if selected_months:
-                monthly_analysis(music, selected_months, chosen_analysis)
+            st.header("Hourly Analysis")
+            timer.run('make_hours', make_hours, total('hours'))
 
-            st.header("Artist Info")
-            big10arts = music.groupby('artist').size().reset_index(name='listen_count').sort_values('listen_count', ascending=False).head(10)['artist']
-            select_artist = st.selectbox("Select Artist for Further Analysis", options=list(big10arts))
-            artist_info(music, select_artist)
+            timer.run('monthly_section', monthly_section, total('monthArtists'), total('monthTitles'))
+            timer.run('artist_section', artist_section, artists, songs, artist_days)
 
             st.header("Platform Analysis")
-            make_platform(music, platforms)
+            timer.run('make_platform', make_platform, days, platforms)
+
+    if timer.enabled:
+        with st.expander("Debug: stage timings"):
+            if timer.memory:
+                st.caption("Memory tracing is on, the seconds are several times slower than without it (?profile=1)")
+            st.dataframe(timer.records)
 else:
     st.info("Upload at least one file")
@@ -0,0 +1,36 @@
+import os, pickle, threading
+import pandas as pd
+from listnd.cache import FrameCache
+
+def frame(n):
+    return pd.DataFrame({'plays': range(n)})
+
+def test_threads_share_one_cache():
+    #Small enough that puts keep evicting what other threads are reading
+    cache = FrameCache(max_bytes=4 * frame(100).memory_usage(deep=True).sum())
+    errors = []
+    def use(worker):
+        try:
+            for i in range(500):
+                key = f'{(worker + i) % 12}'
+                if cache.get(key) is None:
+                    cache.put(key, frame(100))
+        except Exception as error:
+            errors.append(error)
+    threads = [threading.Thread(target=use, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert cache.size == sum(nbytes for _, nbytes in cache.frames.values()) <= cache.max_bytes
+
+def test_spill_dir_keeps_the_most_recent_frames(tmp_path):
+    size = len(pickle.dumps(frame(1000), protocol=pickle.HIGHEST_PROTOCOL))
+    cache = FrameCache(max_bytes=1, spill_dir=str(tmp_path), max_spill_bytes=int(2.5 * size))
+    for key in 'abc':
+        cache.put(key, frame(1000))
+        os.utime(cache._spill_path(key), (ord(key), ord(key))) #written in order, a second apart
+    cache.put('d', frame(1000))
+    assert sorted(os.listdir(tmp_path)) == ['c.pkl', 'd.pkl']
+    assert cache.get('c') is not None
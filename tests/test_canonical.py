@@ -0,0 +1,25 @@
+import pandas as pd
+from listnd.canonical import TrackNames
+from listnd.cleaners import as_categories
+
+def plays(rows):
+    return as_categories(pd.DataFrame(rows, columns=['platform', 'artist', 'title']))
+
+def test_versions_and_remixes_stay_apart():
+    music, renamed = TrackNames().canonicalize(plays([['spotify', 'Taylor Swift', 'Love Story'],
+        ['apple', 'Taylor Swift', "Love Story (Taylor's Version)"], ['spotify', 'Taylor Swift', 'Love Story (Remix)'],
+        ['apple', 'Beyonce', 'Halo (feat. Jay-Z)'], ['spotify', 'Beyoncé', 'Halo']]))
+    assert renamed == 1
+    assert music['title'].tolist() == ['Love Story', "Love Story (Taylor's Version)", 'Love Story (Remix)', 'Halo', 'Halo']
+
+def test_ties_keep_the_spelling_from_the_better_platform():
+    music, renamed = TrackNames().canonicalize(plays([['youtube', 'Queen', 'Bohemian Rapsody'], ['apple', 'Queen', 'Bohemian Rhapsody']]))
+    assert renamed == 1
+    assert music['title'].tolist() == ['Bohemian Rhapsody'] * 2
+
+def test_later_calls_only_add_new_names():
+    names = TrackNames()
+    names.canonicalize(plays([['spotify', 'Adele', 'Hello'], ['spotify', 'Adele', 'Hello'], ['apple', 'Adele', 'Helo']]))
+    music, renamed = names.canonicalize(plays([['youtube', 'adele', 'Hello!'], ['apple', 'Adele', 'Helo']]))
+    assert music['title'].tolist() == ['Hello'] * 2
+    assert names.mapping()[('adele', 'Hello!')] == ('Adele', 'Hello')
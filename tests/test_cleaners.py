@@ -0,0 +1,29 @@
+import pandas as pd
+from listnd.cleaners import clean_apple_history, clean_apple_songs, merge_apple
+
+def apple_history(titles):
+    return clean_apple_history(pd.DataFrame({'Event Start Timestamp': [f'2024-01-0{day}T10:00:00.000Z' for day in range(1, len(titles) + 1)],
+        'Song Name': titles, 'Media Duration In Milliseconds': [180000] * len(titles)}))
+
+def apple_songs(rows):
+    return clean_apple_songs(pd.DataFrame(rows, columns=['Track Name', 'Play Duration Milliseconds', 'Last Played Date']))
+
+def test_merge_apple_keeps_one_row_per_play():
+    #'Halo' is listed under three artists, a join on title would give each play three rows
+    history = apple_history(['Halo', 'Halo', 'Halo', 'Hello', 'Not In Songs'])
+    songs = apple_songs([['Beyonce - Halo', 1000, '2024-01-01'], ['Beyonce - Halo', 1000, '2024-01-02'],
+        ['Ben Harper - Halo', 5000, '2024-01-03'], ['Someone - Halo', 1, '2024-01-04'], ['Adele - Hello', 1000, '2024-01-01']])
+    apple = merge_apple(history, songs)
+    assert len(apple) == len(history)
+    assert apple['artist'].tolist() == ['Beyonce', 'Beyonce', 'Beyonce', 'Adele', 'Unknown']
+
+def test_merge_apple_tie_break_order():
+    #Most rows first, then most time played, then the latest play, then alphabetical
+    history = apple_history(['Rows', 'Duration', 'Latest', 'Name'])
+    songs = apple_songs([['A - Rows', 99, '2024-01-09'], ['B - Rows', 1, '2024-01-01'], ['B - Rows', 1, '2024-01-01'],
+        ['A - Duration', 9, '2024-01-01'], ['B - Duration', 1, '2024-01-09'],
+        ['A - Latest', 5, '2024-01-01'], ['B - Latest', 5, '2024-01-09'],
+        ['B - Name', 5, '2024-01-01'], ['A - Name', 5, '2024-01-01']])
+    apple = merge_apple(history, songs)
+    assert len(apple) == len(history)
+    assert apple['artist'].tolist() == ['B', 'A', 'B', 'A']
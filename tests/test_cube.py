@@ -0,0 +1,27 @@
+import pandas as pd
+from listnd.cube import PartitionedCube
+from listnd.dedup import mark_copies
+
+def plays(rows):
+    music = pd.DataFrame(rows, columns=['platform', 'ts', 'artist', 'title', 'msPlayed'])
+    music['ts'] = pd.to_datetime(music['ts'])
+    music['year'] = music['ts'].dt.year
+    for column, format in [('month', '%m'), ('yearMonth', '%Y-%m'), ('date', '%Y-%m-%d'), ('hour', '%H'), ('weekday', '%A')]:
+        music[column] = music['ts'].dt.strftime(format)
+    return music
+
+def test_copies_only_skipped_when_their_platform_is_selected():
+    #The same play on spotify (ts is its end), apple and youtube, plus an apple play of its own
+    music, repeats = mark_copies(plays([
+        ['spotify', '2024-03-01 10:03:20', 'A', 'S', 200000],
+        ['apple', '2024-03-01 10:00:10', 'A', 'S', 200000],
+        ['youtube', '2024-03-01 10:00:00', 'A', 'S', None],
+        ['apple', '2024-03-04 09:00:00', 'A', 'T', 1000]]))
+    cubes = PartitionedCube(music)
+    assert repeats == {}
+    assert cubes.total('artists', ['spotify', 'apple', 'youtube'], [2024])['A'] == 2
+    assert cubes.shadowed(['spotify', 'apple', 'youtube'], [2024]) == {'apple': 1, 'youtube': 1}
+    assert cubes.total('artists', ['apple'], [2024])['A'] == 2
+    assert cubes.total('artists', ['apple', 'youtube'], [2024])['A'] == 2
+    assert cubes.shadowed(['apple', 'youtube'], [2024]) == {'youtube': 1}
+    assert cubes.total('artists', ['youtube'], [2024])['A'] == 1
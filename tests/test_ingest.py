@@ -0,0 +1,19 @@
+import json
+import pandas as pd
+import pytest
+from listnd.ingest import load_files
+from listnd.profiling import StageTimer
+
+def spotify(n):
+    return json.dumps([{'endTime': f'2024-01-0{day} 10:00', 'artistName': 'A', 'trackName': f'S{day}', 'msPlayed': day} for day in range(1, n + 1)]).encode()
+
+def test_worker_processes_match_loading_in_process():
+    tasks = [('spotify', spotify(2)), ('spotify', spotify(3))]
+    timer = StageTimer(enabled=True)
+    for pooled, serial in zip(load_files(tasks, workers=2, timer=timer), load_files(tasks, workers=1)):
+        pd.testing.assert_frame_equal(pooled, serial)
+    assert [record['stage'] for record in timer.records] == ['parse spotify', 'clean_spotify'] * 2
+
+def test_worker_errors_are_raised_again():
+    with pytest.raises(ValueError):
+        load_files([('spotify', b'not json'), ('spotify', spotify(1))], workers=2)
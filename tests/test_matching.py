@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+from listnd.matching import ArtistMatcher, build_title_pattern, TITLE_CUTS
+
+def test_overlapping_and_suffix_artists():
+    #The classic Aho-Corasick set: 'she' ends inside 'ushers', 'he' is a suffix of it, 'hers' overlaps both
+    matcher = ArtistMatcher(['he', 'she', 'hers'])
+    assert matcher.longest('ushers') == 'hers'
+    assert matcher.longest('ushe') == 'she' #'he' is only found through the fail link
+    assert matcher.longest('ahe') == 'he'
+    assert matcher.longest('hrs') is None
+
+def test_longest_artist_wins_then_earliest():
+    matcher = ArtistMatcher(['Abba', 'Abbas Band', 'Queen', 'Cream'])
+    assert matcher.longest('Abbas Band - Waterloo') == 'Abbas Band'
+    assert matcher.longest('Cream and Queen') == 'Cream' #same length, first in the title
+    assert matcher.longest('Queen and Cream') == 'Queen'
+
+def test_matching_ignores_case_and_keeps_the_written_name():
+    matcher = ArtistMatcher(['Taylor Swift', 'TAYLOR SWIFT', ''])
+    assert matcher.longest('TAYLOR swift - Love Story') == 'Taylor Swift' #the first spelling is kept
+    assert matcher.longest('no artist here') is None #the empty name matches nothing
+
+def test_find_leaves_missing_titles_missing():
+    titles = pd.Series(['Queen - Bohemian Rhapsody', None, np.nan, 'Nobody', 'queen live'], index=[3, 5, 7, 9, 11])
+    found = ArtistMatcher(['Queen']).find(titles)
+    assert found.index.tolist() == titles.index.tolist()
+    assert found.tolist()[:1] + found.tolist()[4:] == ['Queen', 'Queen']
+    assert found.iloc[1:4].isna().all()
+
+def test_title_pattern_cuts_the_longest_phrase():
+    pattern = build_title_pattern(['he', 'hers'], ['(Official)', '(Official Music Video)'])
+    assert pattern.sub('', 'Hers Song (Official Music Video)') == ' Song '
+    assert pattern.sub('', 'HE song (official)') == ' song '
+
+def test_title_pattern_is_literal():
+    #Names and phrases are escaped, '(feat. )' doesn't match any character in place of the dot
+    pattern = build_title_pattern(['P!nk', 'AC/DC', 'a.b'], TITLE_CUTS)
+    assert pattern.sub('', 'AC/DC - Thunderstruck (Official Video)') == '  Thunderstruck '
+    assert pattern.sub('', 'axb (featx )') == 'axb (featx )'
+    assert pattern.sub('', 'P!nk a.b') == ' '
+
+def test_title_pattern_leaves_missing_titles_missing():
+    titles = pd.Series(['Queen - Song', None, np.nan])
+    cleaned = titles.str.replace(build_title_pattern(['Queen']), '', regex=True).str.strip()
+    assert cleaned[0] == 'Song'
+    assert cleaned[1:].isna().all()
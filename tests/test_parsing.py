@@ -0,0 +1,31 @@
+import io, json
+import pytest
+from listnd.parsing import iter_json_array
+
+RECORDS = [{'endTime': '2024-01-01 10:00', 'artistName': 'Beyoncé', 'trackName': 'Halo 🎶', 'msPlayed': 123456},
+    {'trackName': 'Quotes \\" and ] , [ in a string', 'nested': {'list': [1, 2.5, None, True]}, 'msPlayed': 0},
+    12345, -0.5e3, 'text', None, [], {}]
+
+def items(data, chunk_size):
+    return list(iter_json_array(io.BytesIO(data), chunk_size))
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 5, 7, 64, 1 << 20])
+def test_any_chunk_size_gives_what_json_loads_gives(chunk_size):
+    #Tiny chunks split items, escapes and multi-byte UTF-8 characters at every possible place
+    data = json.dumps(RECORDS, ensure_ascii=False, indent=1).encode()
+    assert items(data, chunk_size) == json.loads(data)
+
+@pytest.mark.parametrize('chunk_size', [1, 4, 1 << 20])
+def test_bom_whitespace_and_empty_arrays(chunk_size):
+    assert items('﻿ [ {"a": "é"} ,\r\n {"b": 1} ] \n'.encode(), chunk_size) == [{'a': 'é'}, {'b': 1}]
+    assert items(b'[]', chunk_size) == []
+    assert items(b' \n[\n]\n', chunk_size) == []
+
+@pytest.mark.parametrize('data', [b'', b'[', b'[{"a": 1}', b'[{"a": 1}, {"b"', b'[{"a": "unterminated'])
+def test_truncated_input_raises(data):
+    with pytest.raises(ValueError):
+        items(data, 3)
+
+def test_not_an_array_raises():
+    with pytest.raises(ValueError):
+        items(b'{"a": 1}', 4)
@@ -0,0 +1,19 @@
+import pandas as pd
+from listnd.cleaners import clean_spotify
+from listnd.report import build_report
+
+def report(rows):
+    return build_report({'spotify': clean_spotify(pd.DataFrame(rows, columns=['endTime', 'artistName', 'trackName', 'msPlayed']))})
+
+def test_artist_info_with_two_songs():
+    sections = report([['2024-03-01 10:03', 'A', 'S', 200000], ['2024-03-01 10:08', 'A', 'S', 200000], ['2024-03-02 09:00', 'A', 'T', 1000]])
+    assert sections['Artist Info'][0].endswith("big fan of S and T.")
+
+def test_artist_info_with_one_song():
+    sections = report([['2024-03-01 10:03', 'A', 'S', 200000]])
+    assert sections['Artist Info'][0].endswith("big fan of S.")
+
+def test_artist_info_with_three_songs():
+    sections = report([['2024-03-01 10:03', 'A', 'S', 200000], ['2024-03-01 10:08', 'A', 'S', 200000],
+        ['2024-03-01 10:13', 'A', 'T', 200000], ['2024-03-02 09:00', 'A', 'U', 1000]])
+    assert sections['Artist Info'][0].endswith("big fan of S, T, and U.")
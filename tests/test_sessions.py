@@ -0,0 +1,68 @@
+import pandas as pd
+from listnd.sessions import SESSION_GAP, artist_listens, artist_streaks, binges, listening_stats, session_breaks, sessions, sort_plays
+
+#Five sessions over four days. C is a category nobody played, the 09:05 and 09:08 plays have no artist
+ROWS = [
+    ['2024-03-01 10:00', 'A', 'S'],
+    ['2024-03-01 10:03', 'A', 'S'],
+    ['2024-03-01 10:06', 'A', 'S'],
+    ['2024-03-01 10:50', 'A', 'S'], #44 minutes later, same song but a new session
+    ['2024-03-01 10:53', 'B', 'T'],
+    ['2024-03-01 10:56', 'B', 'T'],
+    ['2024-03-02 09:00', 'A', 'U'],
+    ['2024-03-02 09:05', None, 'X'],
+    ['2024-03-02 09:08', None, 'X'],
+    ['2024-03-03 12:00', 'A', 'S'],
+    ['2024-03-05 12:00', 'B', 'T']]
+
+def plays(rows=ROWS):
+    music = pd.DataFrame(rows, columns=['ts', 'artist', 'title'])
+    music['ts'] = pd.to_datetime(music['ts'])
+    music['artist'] = pd.Categorical(music['artist'], categories=['A', 'B', 'C'])
+    music['title'] = music['title'].astype('category')
+    return music
+
+def test_sessions_split_at_the_gap():
+    music = plays()
+    found = sessions(music, session_breaks(music))
+    assert found['plays'].tolist() == [3, 3, 3, 1, 1]
+    assert found['start'].tolist() == pd.to_datetime(['2024-03-01 10:00', '2024-03-01 10:50', '2024-03-02 09:00',
+        '2024-03-03 12:00', '2024-03-05 12:00']).tolist()
+    assert found['end'].tolist() == pd.to_datetime(['2024-03-01 10:06', '2024-03-01 10:56', '2024-03-02 09:08',
+        '2024-03-03 12:00', '2024-03-05 12:00']).tolist()
+
+def test_gap_of_exactly_session_gap_keeps_the_session():
+    start = pd.Timestamp('2024-03-01 10:00')
+    music = plays([[start, 'A', 'S'], [start + SESSION_GAP, 'A', 'S'], [start + 2 * SESSION_GAP + pd.Timedelta(seconds=1), 'A', 'S']])
+    assert session_breaks(music).tolist() == [True, False, True]
+
+def test_binges_stop_at_session_breaks_and_skip_missing_artists():
+    music = plays()
+    found = binges(music, session_breaks(music))
+    assert found[['artist', 'title', 'plays']].values.tolist() == [['A', 'S', 3], ['B', 'T', 2]]
+    assert found['start'].tolist() == pd.to_datetime(['2024-03-01 10:00', '2024-03-01 10:53']).tolist()
+
+def test_artist_streaks():
+    found = artist_streaks(plays())
+    assert found['artist'].tolist() == ['A', 'B']
+    assert found['days'].tolist() == [3, 1]
+    assert found['start'].tolist() == pd.to_datetime(['2024-03-01', '2024-03-01']).tolist()
+    assert found['end'].tolist() == pd.to_datetime(['2024-03-03', '2024-03-01']).tolist()
+
+def test_artist_streaks_without_known_artists():
+    assert artist_streaks(plays([['2024-03-01 10:00', None, 'X']])).empty
+
+def test_artist_listens_skip_missing_and_unplayed_artists():
+    found = artist_listens(plays())
+    assert found['artist'].tolist() == ['A', 'B']
+    assert found['plays'].tolist() == [6, 3]
+    assert found['first'].tolist() == pd.to_datetime(['2024-03-01 10:00', '2024-03-01 10:53']).tolist()
+    assert found['last'].tolist() == pd.to_datetime(['2024-03-03 12:00', '2024-03-05 12:00']).tolist()
+
+def test_listening_stats_sorts_the_plays_first():
+    music = plays()
+    shuffled = music.sample(frac=1, random_state=0).reset_index(drop=True)
+    assert sort_plays(shuffled)['ts'].tolist() == music['ts'].tolist()
+    expected, found = listening_stats(music), listening_stats(shuffled)
+    for name in expected:
+        pd.testing.assert_frame_equal(found[name], expected[name])
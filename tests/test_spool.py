@@ -0,0 +1,46 @@
+import io, os, time, tracemalloc
+import pytest
+from listnd.spool import UploadSpool
+
+def test_write_keeps_memory_bounded(tmp_path):
+    #A 32 MB upload in 4 MB chunks never holds more than a couple of blocks of it (the one read replaces the one written)
+    spool = UploadSpool(str(tmp_path), block_size=1 << 20)
+    chunks = [io.BytesIO(os.urandom(4 << 20)) for _ in range(8)]
+    tracemalloc.start()
+    offset = 0
+    for chunk in chunks:
+        offset, accepted = spool.write('big', offset, chunk)
+        assert accepted
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert offset == spool.received('big') == 32 << 20
+    assert peak < 3 * spool.block_size
+
+def test_write_refuses_uploads_over_max_bytes(tmp_path):
+    spool = UploadSpool(str(tmp_path), block_size=1024, max_bytes=4096)
+    assert spool.write('up', 0, io.BytesIO(b'x' * 3000)) == (3000, True)
+    with pytest.raises(ValueError):
+        spool.write('up', 3000, io.BytesIO(b'x' * 3000))
+    assert spool.received('up') == 3000 #the refused chunk left nothing behind
+
+def test_discard_and_prune_remove_files(tmp_path):
+    spool = UploadSpool(str(tmp_path))
+    spool.write('done', 0, io.BytesIO(b'[]'))
+    spool.write('old', 0, io.BytesIO(b'[]'))
+    spool.write('new', 0, io.BytesIO(b'[]'))
+    spool.discard('done')
+    old = time.time() - 2 * 24 * 3600
+    os.utime(spool.path('old'), (old, old))
+    spool.prune()
+    assert sorted(os.listdir(tmp_path)) == ['new.part']
+
+def test_open_keeps_files_from_being_pruned(tmp_path):
+    #A file parsed again (another year, or after an eviction) counts as used
+    spool = UploadSpool(str(tmp_path))
+    spool.write('used', 0, io.BytesIO(b'[]'))
+    old = time.time() - 2 * 24 * 3600
+    os.utime(spool.path('used'), (old, old))
+    with spool.open('used') as stream:
+        assert stream.read() == b'[]'
+    spool.prune()
+    assert os.listdir(tmp_path) == ['used.part']
@@ -0,0 +1,23 @@
+import pandas as pd
+from listnd.cleaners import clean_spotify, clean_spotifyFull, unify
+from listnd.store import HistoryStore
+
+def basic(rows):
+    return unify(clean_spotify(pd.DataFrame(rows, columns=['endTime', 'artistName', 'trackName', 'msPlayed'])), 'spotify')
+
+def extended(rows):
+    return unify(clean_spotifyFull(pd.DataFrame(rows, columns=['ts', 'master_metadata_album_artist_name', 'master_metadata_track_name', 'ms_played'])), 'spotify')
+
+def test_exports_imported_separately_keep_one_copy(tmp_path):
+    #The same play ends at 10:03 in the basic export and at 10:03:20 in the extended one
+    library = HistoryStore(str(tmp_path))
+    assert library.add('spotify', basic([['2024-03-01 10:03', 'A', 'S', 200000], ['2024-03-01 12:00', 'A', 'S', 200000]]), source='basic') == 2
+    assert library.add('spotify', extended([['2024-03-01T10:03:20Z', 'A', 'S', 200000], ['2024-03-02T09:00:00Z', 'A', 'S', 1000]]), source='full') == 1
+    plays = library.load()['spotify'].sort_values('ts')
+    assert plays['ts'].dt.strftime('%m-%d %H:%M:%S').tolist() == ['03-01 10:03:00', '03-01 12:00:00', '03-02 09:00:00']
+
+def test_reimport_skips_plays_already_there(tmp_path):
+    library = HistoryStore(str(tmp_path))
+    plays = basic([['2024-03-01 10:03', 'A', 'S', 200000], ['2024-03-01 10:05', 'B', 'T', 100]])
+    assert library.add('spotify', plays, source='first') == 2
+    assert library.add('spotify', plays, source='second') == 0